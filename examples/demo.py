@@ -4,16 +4,20 @@ AEP 快速入门完整示例
 流程:
 1. 配置阶段: 初始化工具环境、添加 tools/skills/library/MCP
 2. 挂载阶段: attach 到 workspace
-3. 运行阶段: 统一通过 session.exec() 调用
+3. 运行阶段: 通过 session.exec() / session.tools / session.skills 调用
 
 运行:
     uv run python examples/demo.py
     uv run python examples/demo.py --no-default-deps
+    uv run python examples/demo.py --reuse-config
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import io
+import os
 import sys
 import tempfile
 from pathlib import Path
@@ -94,15 +98,47 @@ LIBRARY_DOC = """# Quickstart Notes
 - MCP server 会被转成 tools 下的可调用模块
 """
 
+# 源码只在导入时编码一次，写文件时直接使用 bytes
+_TOOL_SOURCE_B = TOOL_SOURCE.encode("utf-8")
+_SKILL_MAIN_B = SKILL_MAIN.encode("utf-8")
+_SKILL_MD_B = SKILL_MD.encode("utf-8")
+_LIBRARY_DOC_B = LIBRARY_DOC.encode("utf-8")
 
-def run_and_print(session, command: str) -> None:
-    print(f"\n>>> {command}")
-    result = session.exec(command)
+
+def cached_config_dir(tool_dependencies: list[str]) -> Path:
+    """
+    按示例源码与工具依赖计算持久配置目录
+
+    内容不变时重复运行会落到同一目录，EnvManager 直接复用其中已安装的
+    tools/.venv，跳过依赖安装。
+    """
+    digest = hashlib.sha256()
+    for payload in (_TOOL_SOURCE_B, _SKILL_MAIN_B, _SKILL_MD_B, _LIBRARY_DOC_B):
+        digest.update(payload)
+    digest.update("\n".join(tool_dependencies).encode("utf-8"))
+    cache_root = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser()
+    return cache_root / "aep-demo" / digest.hexdigest()[:16]
+
+
+def print_result(label: str, result, out: io.StringIO) -> None:
+    print(f"\n>>> {label}", file=out)
     if result.stdout:
-        print(result.stdout.strip())
+        print(result.stdout.strip(), file=out)
     if result.stderr:
-        print("[stderr]")
-        print(result.stderr.strip())
+        print("[stderr]", file=out)
+        print(result.stderr.strip(), file=out)
+
+
+def run_and_print(session, commands: list[str], out: io.StringIO) -> None:
+    # 连续的 tools run 由 exec_many 合并到同一个子进程执行
+    for command, result in zip(commands, session.exec_many(commands)):
+        print_result(command, result, out)
+
+
+def print_phase(title: str, out: io.StringIO, leading_newline: bool = True) -> None:
+    print(("\n" if leading_newline else "") + "=" * 64, file=out)
+    print(title, file=out)
+    print("=" * 64, file=out)
 
 
 def main() -> None:
@@ -118,29 +154,43 @@ def main() -> None:
         default=[],
         help="额外追加工具依赖，可重复传入",
     )
+    parser.add_argument(
+        "--reuse-config",
+        action="store_true",
+        help="配置目录放到 $XDG_CACHE_HOME/aep-demo/<hash>，重复运行时复用 venv",
+    )
     args = parser.parse_args()
 
+    tool_dependencies = [
+        *(() if args.no_default_deps else EnvManager.DEFAULT_TOOL_DEPENDENCIES),
+        *args.extra_tool_dep,
+    ]
+
     with tempfile.TemporaryDirectory() as tmpdir:
         root = Path(tmpdir)
-        config_dir = root / "agent_config"
+        config_dir = (
+            cached_config_dir(tool_dependencies)
+            if args.reuse_config
+            else root / "agent_config"
+        )
         workspace = root / "workspace"
         workspace.mkdir()
 
         # 准备源文件
         tool_file = root / "data_lab.py"
-        tool_file.write_text(TOOL_SOURCE, encoding="utf-8")
+        tool_file.write_bytes(_TOOL_SOURCE_B)
 
         skill_dir = root / "report_skill"
         skill_dir.mkdir()
-        (skill_dir / "main.py").write_text(SKILL_MAIN, encoding="utf-8")
-        (skill_dir / "SKILL.md").write_text(SKILL_MD, encoding="utf-8")
+        (skill_dir / "main.py").write_bytes(_SKILL_MAIN_B)
+        (skill_dir / "SKILL.md").write_bytes(_SKILL_MD_B)
 
         library_file = root / "quickstart.md"
-        library_file.write_text(LIBRARY_DOC, encoding="utf-8")
+        library_file.write_bytes(_LIBRARY_DOC_B)
 
-        print("=" * 64)
-        print("1) 配置阶段")
-        print("=" * 64)
+        # 每个阶段的输出先写入缓冲区，阶段结束时一次性写到 stdout
+        buf = io.StringIO()
+        print_phase("1) 配置阶段", buf, leading_newline=False)
 
         config = EnvManager(
             config_dir,
@@ -148,8 +198,8 @@ def main() -> None:
             include_default_tool_dependencies=not args.no_default_deps,
             tool_dependencies=args.extra_tool_dep or None,
         )
-        print(f"配置目录: {config_dir}")
-        print(f"默认工具依赖: {', '.join(config.DEFAULT_TOOL_DEPENDENCIES)}")
+        print(f"配置目录: {config_dir}", file=buf)
+        print(f"默认工具依赖: {', '.join(config.DEFAULT_TOOL_DEPENDENCIES)}", file=buf)
 
         # 添加 tools / skills / library
         config.add_tool(tool_file, name="data_lab")
@@ -167,22 +217,24 @@ def main() -> None:
 
         req_file = config.tools_dir / "requirements.txt"
         if req_file.exists():
-            print("\n[tools requirements.txt]")
-            print(req_file.read_text(encoding="utf-8").strip())
+            print("\n[tools requirements.txt]", file=buf)
+            print(req_file.read_text(encoding="utf-8").strip(), file=buf)
+        sys.stdout.write(buf.getvalue())
 
-        print("\n" + "=" * 64)
-        print("2) 挂载阶段")
-        print("=" * 64)
+        buf = io.StringIO()
+        print_phase("2) 挂载阶段", buf)
         aep = AEP.attach(workspace=workspace, config=config)
         session = aep.create_session()
-        print(f"工作区: {workspace}")
-
-        print("\n" + "=" * 64)
-        print("3) 运行阶段")
-        print("=" * 64)
-        run_and_print(session, "tools list")
-        run_and_print(session, "skills list")
-        run_and_print(session, "cat .agents/library/quickstart.md")
+        print(f"工作区: {workspace}", file=buf)
+        sys.stdout.write(buf.getvalue())
+
+        buf = io.StringIO()
+        print_phase("3) 运行阶段", buf)
+        run_and_print(
+            session,
+            ["tools list", "skills list", "cat .agents/library/quickstart.md"],
+            buf,
+        )
 
         # 单个 tools run 代码块里同时调用本地工具和 MCP 工具
         code = """
@@ -196,13 +248,18 @@ print('plot_path:', plot_path)
 print('mcp_echo:', echo_text)
 print('mcp_add:', sum_text)
 """.strip()
-        run_and_print(session, f"tools run '''{code}'''")
-
-        run_and_print(session, "skills run report_skill/main.py AEP")
+        # 程序化调用直接走 session.tools / session.skills，代码无需引号包裹
+        print_result(
+            f"session.tools.run('''{code}''')", session.tools.run(code), buf
+        )
+        print_result(
+            'session.skills.run("report_skill/main.py", ["AEP"])',
+            session.skills.run("report_skill/main.py", ["AEP"]),
+            buf,
+        )
 
-        print("\n" + "=" * 64)
-        print("完成: 你现在可以基于这个模板扩展自己的 agent 能力栈")
-        print("=" * 64)
+        print_phase("完成: 你现在可以基于这个模板扩展自己的 agent 能力栈", buf)
+        sys.stdout.write(buf.getvalue())
 
 
 if __name__ == "__main__":
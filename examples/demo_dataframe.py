@@ -72,6 +72,7 @@ Usage:
     tools run "df = tools.generate_data.create_named(); tools.analyze_data.summary(df)"
 """
 
+import numpy as np
 import pandas as pd
 
 
@@ -85,21 +86,24 @@ def find_max(df: pd.DataFrame) -> dict:
     Returns:
         包含最大值信息的字典
     """
-    max_value = df.max().max()
-    
-    # 找到最大值所在的位置
-    for col in df.columns:
-        col_max = df[col].max()
-        if col_max == max_value:
-            row_idx = df[col].idxmax()
-            return {
-                "max_value": float(max_value),
-                "column": col,
-                "row": int(row_idx),
-                "message": f"最大值 {max_value:.4f} 位于 [{row_idx}, {col}]"
-            }
-    
-    return {"max_value": float(max_value)}
+    # 只看数值列；一次 NumPy 扫描定位最大值（忽略 NaN，与 df.max() 语义一致）
+    df = df.select_dtypes("number")
+    arr = df.to_numpy(dtype=float)
+    if arr.size == 0 or np.isnan(arr).all():
+        # 空表或全为 NaN：没有可定位的最大值
+        return {"max_value": float("nan")}
+
+    # 按列优先扫描（转置后展开）：并列时取第一个含最大值的列、该列中第一行
+    c, r = divmod(int(np.nanargmax(arr.T)), arr.shape[0])
+    max_value = float(arr[r, c])
+    row_idx = df.index[r]
+    col = df.columns[c]
+    return {
+        "max_value": max_value,
+        "column": col,
+        "row": int(row_idx),
+        "message": f"最大值 {max_value:.4f} 位于 [{row_idx}, {col}]"
+    }
 
 
 def summary(df: pd.DataFrame) -> str:
@@ -112,6 +116,10 @@ def column_max(df: pd.DataFrame, column: str) -> float:
     return float(df[column].max())
 '''
 
+# 两个演示都会写出同样的工具源码，导入时编码一次即可
+_GENERATE_DATA_TOOL_B = GENERATE_DATA_TOOL.encode("utf-8")
+_ANALYZE_DATA_TOOL_B = ANALYZE_DATA_TOOL.encode("utf-8")
+
 
 def demo_with_add_tool_dependencies():
     """
@@ -128,10 +136,10 @@ def demo_with_add_tool_dependencies():
 
         # 准备工具源文件
         tool1_source = tmpdir / "generate_data.py"
-        tool1_source.write_text(GENERATE_DATA_TOOL, encoding="utf-8")
+        tool1_source.write_bytes(_GENERATE_DATA_TOOL_B)
 
         tool2_source = tmpdir / "analyze_data.py"
-        tool2_source.write_text(ANALYZE_DATA_TOOL, encoding="utf-8")
+        tool2_source.write_bytes(_ANALYZE_DATA_TOOL_B)
 
         # === 配置阶段 ===
         config_dir = tmpdir / "agent_config"
@@ -163,28 +171,24 @@ def demo_with_add_tool_dependencies():
         session = aep.create_session()
 
         # ⭐ 关键演示: 在单个 tools run 中组合调用两个工具
-        print("\n>>> 组合调用: 生成 DataFrame 并找最大值")
-        print(
-            'tools run "df = tools.generate_data.create(50, 3); tools.analyze_data.find_max(df)"'
-        )
-        result = session.exec(
-            'tools run "df = tools.generate_data.create(50, 3); tools.analyze_data.find_max(df)"'
-        )
-        print(f"stdout: {result.stdout}")
-        if result.stderr:
-            print(f"stderr: {result.stderr}")
-
-        # 另一个组合调用示例
-        print("\n>>> 组合调用: 生成命名列 DataFrame 并获取摘要")
-        print(
-            'tools run "df = tools.generate_data.create_named(); tools.analyze_data.summary(df)"'
-        )
-        result = session.exec(
-            'tools run "df = tools.generate_data.create_named(); tools.analyze_data.summary(df)"'
-        )
-        print(f"stdout: {result.stdout}")
-        if result.stderr:
-            print(f"stderr: {result.stderr}")
+        # exec_many 把两条 tools run 放进同一个子进程，pandas 只导入一次
+        demos = [
+            (
+                "组合调用: 生成 DataFrame 并找最大值",
+                'tools run "df = tools.generate_data.create(50, 3); tools.analyze_data.find_max(df)"',
+            ),
+            (
+                "组合调用: 生成命名列 DataFrame 并获取摘要",
+                'tools run "df = tools.generate_data.create_named(); tools.analyze_data.summary(df)"',
+            ),
+        ]
+        results = session.exec_many([command for _, command in demos])
+        for (title, command), result in zip(demos, results):
+            print(f"\n>>> {title}")
+            print(command)
+            print(f"stdout: {result.stdout}")
+            if result.stderr:
+                print(f"stderr: {result.stderr}")
 
 
 def demo_with_add_dependencies():
@@ -202,10 +206,10 @@ def demo_with_add_dependencies():
 
         # 准备工具源文件
         tool1_source = tmpdir / "generate_data.py"
-        tool1_source.write_text(GENERATE_DATA_TOOL, encoding="utf-8")
+        tool1_source.write_bytes(_GENERATE_DATA_TOOL_B)
 
         tool2_source = tmpdir / "analyze_data.py"
-        tool2_source.write_text(ANALYZE_DATA_TOOL, encoding="utf-8")
+        tool2_source.write_bytes(_ANALYZE_DATA_TOOL_B)
 
         # === 配置阶段 ===
         config_dir = tmpdir / "agent_config"
@@ -243,8 +247,8 @@ def demo_with_add_dependencies():
         print(
             "tools run \"df = tools.generate_data.create_named(); print(tools.analyze_data.column_max(df, 'C'))\""
         )
-        result = session.exec(
-            "tools run \"df = tools.generate_data.create_named(); print(tools.analyze_data.column_max(df, 'C'))\""
+        result = session.tools.run(
+            "df = tools.generate_data.create_named(); print(tools.analyze_data.column_max(df, 'C'))"
         )
         print(f"stdout: {result.stdout}")
         if result.stderr:
@@ -260,7 +264,7 @@ print(f"最大值: {result['max_value']:.4f}")
 print(f"位置: 第 {result['row']} 行, {result['column']} 列")
 """
         print(f"tools run '''{code}'''")
-        result = session.exec(f"tools run '''{code}'''")
+        result = session.tools.run(code)
         print(f"stdout: {result.stdout}")
         if result.stderr:
             print(f"stderr: {result.stderr}")
@@ -16,11 +16,13 @@ from __future__ import annotations
 import argparse
 import os
 import socket
+import string
 import subprocess
 import sys
 import tempfile
 import textwrap
 import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
 
@@ -29,6 +31,28 @@ from aep.core.config.handlers.mcp import MCPTransport
 
 ECHO_SERVER = Path(__file__).resolve().parents[1] / "tests" / "mcp" / "echo_server.py"
 
+# 最小 Streamable HTTP MCP server 脚本模板，只有 $port 需要替换
+_STREAMABLE_SERVER_TEMPLATE = string.Template(
+    textwrap.dedent(
+        """
+        from mcp.server.fastmcp import FastMCP
+
+        mcp = FastMCP("echo-http-server", host="127.0.0.1", port=$port, streamable_http_path="/mcp")
+
+        @mcp.tool()
+        def echo(message: str) -> str:
+            return f"Echo: {message}"
+
+        @mcp.tool()
+        def add(a: int, b: int) -> str:
+            return str(a + b)
+
+        if __name__ == "__main__":
+            mcp.run(transport="streamable-http")
+        """
+    ).strip()
+)
+
 
 def build_tools_run_code() -> str:
     """构建单段 Python 代码，用于 tools run"""
@@ -55,25 +79,8 @@ def find_free_port() -> int:
 
 def write_streamable_server_script(script_path: Path, port: int) -> None:
     """写入一个最小 Streamable HTTP MCP server 脚本"""
-    script = textwrap.dedent(
-        f"""
-        from mcp.server.fastmcp import FastMCP
-
-        mcp = FastMCP("echo-http-server", host="127.0.0.1", port={port}, streamable_http_path="/mcp")
-
-        @mcp.tool()
-        def echo(message: str) -> str:
-            return f"Echo: {{message}}"
-
-        @mcp.tool()
-        def add(a: int, b: int) -> str:
-            return str(a + b)
-
-        if __name__ == "__main__":
-            mcp.run(transport="streamable-http")
-        """
-    ).strip()
-    script_path.write_text(script, encoding="utf-8")
+    script = _STREAMABLE_SERVER_TEMPLATE.substitute(port=port)
+    script_path.write_bytes(script.encode("utf-8"))
 
 
 @contextmanager
@@ -81,7 +88,7 @@ def run_streamable_server(script_path: Path, port: int) -> str:
     """启动 Streamable HTTP MCP server 子进程并返回 URL"""
     proc = subprocess.Popen([sys.executable, str(script_path)])
     try:
-        # URL 已知，服务是否就绪由 add_mcp_server 重试保证
+        # URL 已知，服务是否就绪由 wait_for_port 探测保证
         url = f"http://127.0.0.1:{port}/mcp"
         yield url
     finally:
@@ -93,23 +100,31 @@ def run_streamable_server(script_path: Path, port: int) -> str:
                 proc.kill()
 
 
-def add_streamable_server_with_retry(config: EnvManager, name: str, url: str) -> None:
-    """等待服务就绪后添加 Streamable HTTP MCP server"""
-    last_error: Exception | None = None
-    for _ in range(20):
+def wait_for_port(port: int, budget: float = 5.0) -> bool:
+    """主动探测本地端口，端口可连接即返回 True，超出 budget 秒返回 False"""
+    deadline = time.monotonic() + budget
+    delay = 0.005
+    while time.monotonic() < deadline:
         try:
-            config.add_mcp_server(
-                name,
-                transport=MCPTransport.HTTP,
-                url=url,
-            )
-            return
-        except Exception as exc:
-            last_error = exc
-            time.sleep(0.3)
-
-    raise RuntimeError(
-        f"streamable MCP 添加失败: {last_error}"
+            with socket.create_connection(("127.0.0.1", port), timeout=0.05):
+                return True
+        except OSError:
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.05)
+    return False
+
+
+def add_streamable_server_when_ready(
+    config: EnvManager, name: str, url: str, port: int
+) -> None:
+    """等待服务端口就绪后添加 Streamable HTTP MCP server（只调用一次）"""
+    if not wait_for_port(port):
+        raise RuntimeError(f"streamable MCP 服务未就绪: {url}")
+
+    config.add_mcp_server(
+        name,
+        transport=MCPTransport.HTTP,
+        url=url,
     )
 
 
@@ -135,44 +150,49 @@ def main() -> None:
 
         config = EnvManager(config_dir)
 
-        # 1) STDIO MCP
-        config.add_mcp_server(
-            "echo_stdio",
-            transport=MCPTransport.STDIO,
-            command=sys.executable,
-            args=[str(ECHO_SERVER)],
-        )
-
-        # 2) Streamable HTTP MCP（脚本内自动起子进程）
-        port = find_free_port()
-        server_script = tmpdir_path / f"echo_http_server_{port}.py"
-        write_streamable_server_script(server_script, port)
-
-        with run_streamable_server(server_script, port) as streamable_url:
-            add_streamable_server_with_retry(config, "echo_http", streamable_url)
-
-            # MCP stub 在 tools/.venv 中运行，需要可导入 mcp 包
-            config.add_tool_dependency("mcp")
-
-            config.index()
-
-            aep = AEP.attach(workspace=workspace, config=config)
-            session = aep.create_session()
-
-            # 在一个 tools run 代码块中同时演示 stdio + streamable
-            code = build_tools_run_code()
-            command = f"tools run '''{code}'''"
-            result = session.exec(command)
-
-            print(">>> streamable_url")
-            print(streamable_url)
-            print("\n>>> command")
-            print(command)
-            print("\n>>> stdout")
-            print(result.stdout)
-            if result.stderr:
-                print("\n>>> stderr")
-                print(result.stderr)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            # MCP stub 在 tools/.venv 中运行，需要可导入 mcp 包；
+            # 安装与下面的 server 发现/启动互不依赖，放到后台线程并行进行
+            dep_future = pool.submit(config.add_tool_dependency, "mcp")
+
+            # 1) STDIO MCP
+            config.add_mcp_server(
+                "echo_stdio",
+                transport=MCPTransport.STDIO,
+                command=sys.executable,
+                args=[str(ECHO_SERVER)],
+            )
+
+            # 2) Streamable HTTP MCP（脚本内自动起子进程）
+            port = find_free_port()
+            server_script = tmpdir_path / f"echo_http_server_{port}.py"
+            write_streamable_server_script(server_script, port)
+
+            with run_streamable_server(server_script, port) as streamable_url:
+                add_streamable_server_when_ready(
+                    config, "echo_http", streamable_url, port
+                )
+                dep_future.result()
+
+                config.index()
+
+                aep = AEP.attach(workspace=workspace, config=config)
+                session = aep.create_session()
+
+                # 在一个 tools run 代码块中同时演示 stdio + streamable
+                code = build_tools_run_code()
+                command = f"tools run '''{code}'''"
+                result = session.exec(command)
+
+                print(">>> streamable_url")
+                print(streamable_url)
+                print("\n>>> command")
+                print(command)
+                print("\n>>> stdout")
+                print(result.stdout)
+                if result.stderr:
+                    print("\n>>> stderr")
+                    print(result.stderr)
 
 
 if __name__ == "__main__":
@@ -4,6 +4,8 @@ AEP - Agent Environment Protocol 主类
 提供 attach() 方法将配置挂载到工作区。
 """
 
+import os
+import stat
 from pathlib import Path
 from typing import Optional
 
@@ -12,6 +14,12 @@ from loguru import logger
 from aep.core.config import EnvManager
 from aep.core.session import AEPSession
 
+# 当前平台是否支持以目录 fd 为基准的 stat/unlink/symlink（Windows 不支持）
+_DIR_FD_SUPPORTED = (
+    hasattr(os, "O_DIRECTORY")
+    and {os.stat, os.unlink, os.symlink} <= os.supports_dir_fd
+)
+
 
 class AEP:
     """
@@ -40,6 +48,8 @@ class AEP:
             self.workspace / agent_dir if self.workspace else None
         )
         self.config: Optional[EnvManager] = None
+        # 挂载名 -> 已解析的目标目录，attach 时计算一次，供会话直接复用
+        self._resolved_mounts: dict[str, Path] = {}
 
     @classmethod
     def attach(
@@ -91,29 +101,51 @@ class AEP:
             ("library", self.config.library_dir),
         ]
 
-        for name, target in links:
-            link = self.agent_dir / name
-
-            # 如果存在且不是符号链接，直接报错保护用户目录
-            if link.exists() and not link.is_symlink():
-                raise RuntimeError(
-                    f"协议目录冲突: {link} 已存在且不是符号链接，请手动处理"
-                )
+        # 支持 *at 系列调用时打开一次 agent_dir，后续按名字相对该 fd 操作，
+        # 内核不必每次从根重新解析整条路径
+        dir_fd = (
+            os.open(self.agent_dir, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+            if _DIR_FD_SUPPORTED
+            else None
+        )
+        try:
+            for name, target in links:
+                link = self.agent_dir / name
+                path = name if dir_fd is not None else link
 
-            # 如果链接已存在，先删除
-            if link.is_symlink():
+                # 一次 lstat 判断现状：不存在 / 旧符号链接 / 用户的真实文件或目录
+                try:
+                    st = os.stat(path, dir_fd=dir_fd, follow_symlinks=False)
+                except FileNotFoundError:
+                    st = None
+
+                # 如果存在且不是符号链接，直接报错保护用户目录
+                if st is not None and not stat.S_ISLNK(st.st_mode):
+                    raise RuntimeError(
+                        f"协议目录冲突: {link} 已存在且不是符号链接，请手动处理"
+                    )
+
+                # 如果链接已存在，先删除
+                if st is not None:
+                    try:
+                        os.unlink(path, dir_fd=dir_fd)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        logger.warning(f"删除旧链接失败: {link}, {e}")
+
+                # 创建链接
                 try:
-                    link.unlink()
+                    os.symlink(target, path, target_is_directory=True, dir_fd=dir_fd)
+                    logger.debug(f"创建链接: {link} -> {target}")
                 except OSError as e:
-                    logger.warning(f"删除旧链接失败: {link}, {e}")
+                    logger.error(f"创建链接失败: {e}")
+                    raise
 
-            # 创建链接
-            try:
-                link.symlink_to(target, target_is_directory=True)
-                logger.debug(f"创建链接: {link} -> {target}")
-            except OSError as e:
-                logger.error(f"创建链接失败: {e}")
-                raise
+                self._resolved_mounts[name] = target.resolve(strict=False)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
 
     def create_session(self) -> AEPSession:
         """
@@ -125,7 +157,7 @@ class AEP:
         if self.workspace is None or self.config is None:
             raise RuntimeError("AEP 未正确初始化，请使用 AEP.attach() 创建实例")
 
-        return AEPSession(self.workspace, self.config)
+        return AEPSession(self.workspace, self.config, mounts=self._resolved_mounts)
 
     def detach(self) -> None:
         """
@@ -141,9 +173,15 @@ class AEP:
 
         for name in ["tools", "skills", "library"]:
             link = self.agent_dir / name
-            if link.is_symlink():
-                link.unlink()
+            try:
+                is_link = stat.S_ISLNK(os.lstat(link).st_mode)
+            except FileNotFoundError:
+                continue
+            # 只删除符号链接，不碰用户放在同名位置的真实文件/目录
+            if is_link:
+                os.unlink(link)
                 logger.debug(f"删除符号链接: {link}")
+        self._resolved_mounts.clear()
 
         # 如果 agent_dir 为流浪(不再有链接或文件)，删除它
         try:
@@ -4,6 +4,11 @@ AEP 配置模块
 提供环境配置管理能力。
 """
 
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_getattr
 from .envconfig import (
     EnvConfig,
     ToolConfig,
@@ -12,8 +17,17 @@ from .envconfig import (
     MCPServerConfig,
 )
 from .envmanager import EnvManager
-from .handlers import ToolsHandler, SkillsHandler, LibraryHandler, MCPHandler
-from .handlers.mcp import MCPTransport
+from .handlers import __all__ as _HANDLER_EXPORTS
+
+if TYPE_CHECKING:
+    from .handlers import ToolsHandler, SkillsHandler, LibraryHandler, MCPHandler
+    from .handlers.mcp import MCPTransport
+
+# 处理器按需导入（handlers 包本身不导入任何处理器），见 handlers/__init__.py
+_LAZY_EXPORTS = {
+    **dict.fromkeys(_HANDLER_EXPORTS, ".handlers"),
+    "MCPTransport": ".handlers.mcp",
+}
 
 
 __all__ = [
@@ -33,3 +47,5 @@ __all__ = [
     # 枚举
     "MCPTransport",
 ]
+
+__getattr__ = lazy_getattr(__name__, globals(), _LAZY_EXPORTS)
@@ -0,0 +1,36 @@
+"""
+按需导入导出名（PEP 562 模块级 __getattr__）
+
+config 与 config.handlers 共用，首次访问导出名时才导入其定义所在的子模块。
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Any, Callable, Mapping
+
+
+def lazy_getattr(
+    package: str, namespace: dict[str, Any], exports: Mapping[str, str]
+) -> Callable[[str], Any]:
+    """
+    构造模块级 __getattr__
+
+    Args:
+        package: 调用方模块名（__name__），相对导入以它为基准
+        namespace: 调用方的 globals()，导入后的值写回其中，后续访问不再经过 __getattr__
+        exports: 导出名 → 定义所在的（相对）模块名
+
+    Returns:
+        可直接赋给调用方 __getattr__ 的函数
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        namespace[name] = value
+        return value
+
+    return __getattr__
@@ -11,14 +11,19 @@ from pathlib import Path
 from typing import Optional
 
 
-@dataclass
-class ToolConfig:
-    """单个工具的配置"""
+@dataclass(slots=True)
+class _NamedSourceConfig:
+    """带名称、源路径和依赖列表的配置（工具 / 技能共用）"""
 
     name: str
-    source: Path
+    source: str | Path
     dependencies: list[str] = field(default_factory=list)
 
+    @property
+    def source_path(self) -> Path:
+        """源路径（按需构造 Path）"""
+        return Path(self.source)
+
     def to_dict(self) -> dict:
         return {
             "name": self.name,
@@ -27,44 +32,36 @@ class ToolConfig:
         }
 
     @classmethod
-    def from_dict(cls, data: dict) -> "ToolConfig":
+    def from_dict(cls, data: dict) -> "_NamedSourceConfig":
+        # source 保持字符串，需要时再通过 source_path 构造 Path
         return cls(
             name=data["name"],
-            source=Path(data["source"]),
+            source=data["source"],
             dependencies=data.get("dependencies", []),
         )
 
 
-@dataclass
-class SkillConfig:
-    """单个技能的配置"""
-
-    name: str
-    source: Path
-    dependencies: list[str] = field(default_factory=list)
+@dataclass(slots=True)
+class ToolConfig(_NamedSourceConfig):
+    """单个工具的配置"""
 
-    def to_dict(self) -> dict:
-        return {
-            "name": self.name,
-            "source": str(self.source),
-            "dependencies": self.dependencies,
-        }
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "SkillConfig":
-        return cls(
-            name=data["name"],
-            source=Path(data["source"]),
-            dependencies=data.get("dependencies", []),
-        )
+@dataclass(slots=True)
+class SkillConfig(_NamedSourceConfig):
+    """单个技能的配置"""
 
 
-@dataclass
+@dataclass(slots=True)
 class LibraryConfig:
     """单个资料的配置"""
 
     name: str
-    source: Path
+    source: str | Path
+
+    @property
+    def source_path(self) -> Path:
+        """源路径（按需构造 Path）"""
+        return Path(self.source)
 
     def to_dict(self) -> dict:
         return {
@@ -74,13 +71,14 @@ class LibraryConfig:
 
     @classmethod
     def from_dict(cls, data: dict) -> "LibraryConfig":
+        # source 保持字符串，需要时再通过 source_path 构造 Path
         return cls(
             name=data["name"],
-            source=Path(data["source"]),
+            source=data["source"],
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class MCPServerConfig:
     """MCP 服务器配置"""
 
@@ -119,56 +117,69 @@ class MCPServerConfig:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class EnvConfig:
     """
     环境配置数据结构
 
     纯数据模型，定义配置目录结构和各项配置数据。
+    config_dir 在初始化时解析一次，各子目录路径随之预先计算。
     """
 
     config_dir: Path
+    _tools_dir: Path = field(init=False, repr=False, compare=False)
+    _tools_venv_dir: Path = field(init=False, repr=False, compare=False)
+    _tools_requirements: Path = field(init=False, repr=False, compare=False)
+    _skills_dir: Path = field(init=False, repr=False, compare=False)
+    _library_dir: Path = field(init=False, repr=False, compare=False)
+    _mcp_config_dir: Path = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
         self.config_dir = Path(self.config_dir).resolve()
+        self._tools_dir = self.config_dir / "tools"
+        self._tools_venv_dir = self._tools_dir / ".venv"
+        self._tools_requirements = self._tools_dir / "requirements.txt"
+        self._skills_dir = self.config_dir / "skills"
+        self._library_dir = self.config_dir / "library"
+        self._mcp_config_dir = self.config_dir / "_mcp"
 
     # === 目录路径属性 ===
 
     @property
     def tools_dir(self) -> Path:
         """工具目录"""
-        return self.config_dir / "tools"
+        return self._tools_dir
 
     @property
     def tools_venv_dir(self) -> Path:
         """工具虚拟环境目录"""
-        return self.tools_dir / ".venv"
+        return self._tools_venv_dir
 
     @property
     def tools_requirements(self) -> Path:
         """工具依赖文件"""
-        return self.tools_dir / "requirements.txt"
+        return self._tools_requirements
 
     @property
     def skills_dir(self) -> Path:
         """技能目录"""
-        return self.config_dir / "skills"
+        return self._skills_dir
 
     @property
     def library_dir(self) -> Path:
         """资料库目录"""
-        return self.config_dir / "library"
+        return self._library_dir
 
     @property
     def mcp_config_dir(self) -> Path:
         """MCP 配置存储目录 (config_dir/_mcp/)，不挂载到工作区"""
-        return self.config_dir / "_mcp"
+        return self._mcp_config_dir
 
     # === 辅助方法 ===
 
     def skill_dir(self, name: str) -> Path:
         """获取特定技能的目录"""
-        return self.skills_dir / name
+        return self._skills_dir / name
 
     def skill_venv_dir(self, name: str) -> Path:
         """获取特定技能的虚拟环境目录"""
@@ -180,11 +191,11 @@ class EnvConfig:
 
     def tool_path(self, name: str) -> Path:
         """获取工具文件路径"""
-        return self.tools_dir / f"{name}.py"
+        return self._tools_dir / f"{name}.py"
 
     def mcp_config_path(self, name: str) -> Path:
         """获取 MCP 服务器配置目录路径"""
-        return self.mcp_config_dir / name
+        return self._mcp_config_dir / name
 
     def __repr__(self) -> str:
         return f"EnvConfig({self.config_dir})"
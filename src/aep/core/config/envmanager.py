@@ -6,12 +6,22 @@ EnvManager - 环境配置管理器
 
 from __future__ import annotations
 
+import hashlib
+import os
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from loguru import logger
 
 from .envconfig import EnvConfig
-from .handlers import ToolsHandler, SkillsHandler, LibraryHandler, MCPHandler
+
+if TYPE_CHECKING:
+    from .handlers.library import LibraryHandler
+    from .handlers.mcp import MCPHandler
+    from .handlers.skills import SkillsHandler
+    from .handlers.tools import ToolsHandler
 
 
 class EnvManager:
@@ -67,11 +77,14 @@ class EnvManager:
         """
         self.config = EnvConfig(config_dir)
 
-        # 初始化处理器
-        self._tools = ToolsHandler(self.config)
-        self._skills = SkillsHandler(self.config)
-        self._library = LibraryHandler(self.config)
-        self._mcp = MCPHandler(self.config)
+        # 处理器在首次访问时才导入并创建
+        self._tools: ToolsHandler | None = None
+        self._skills: SkillsHandler | None = None
+        self._library: LibraryHandler | None = None
+        self._mcp: MCPHandler | None = None
+
+        # 上一次 index() 时的目录指纹，未变化则跳过重新生成
+        self._index_digest: bytes | None = None
 
         # 创建目录结构
         self._init_dirs()
@@ -85,48 +98,82 @@ class EnvManager:
         logger.info(f"EnvManager 初始化: {self.config.config_dir}")
 
     def _init_dirs(self) -> None:
-        """创建配置目录结构"""
-        self.config.config_dir.mkdir(parents=True, exist_ok=True)
-        self.config.tools_dir.mkdir(exist_ok=True)
-        self.config.skills_dir.mkdir(exist_ok=True)
-        self.config.library_dir.mkdir(exist_ok=True)
-        self.config.mcp_config_dir.mkdir(exist_ok=True)
+        """创建配置目录结构
+
+        先扫描一次 config_dir，只创建缺失的子目录；已初始化的目录不再逐个 mkdir。
+        """
+        config_dir = self.config.config_dir
+        try:
+            with os.scandir(config_dir) as it:
+                existing = {e.name for e in it if e.is_dir()}
+        except FileNotFoundError:
+            config_dir.mkdir(parents=True, exist_ok=True)
+            existing = set()
+
+        for subdir in (
+            self.config.tools_dir,
+            self.config.skills_dir,
+            self.config.library_dir,
+            self.config.mcp_config_dir,
+        ):
+            if subdir.name not in existing:
+                subdir.mkdir(exist_ok=True)
 
     # === 处理器访问 ===
 
     @property
     def tools(self) -> ToolsHandler:
         """工具处理器"""
+        if self._tools is None:
+            from .handlers.tools import ToolsHandler
+
+            self._tools = ToolsHandler(self.config)
         return self._tools
 
     @property
     def skills(self) -> SkillsHandler:
         """技能处理器"""
+        if self._skills is None:
+            from .handlers.skills import SkillsHandler
+
+            self._skills = SkillsHandler(self.config)
         return self._skills
 
     @property
     def library(self) -> LibraryHandler:
         """资料库处理器"""
+        if self._library is None:
+            from .handlers.library import LibraryHandler
+
+            self._library = LibraryHandler(self.config)
         return self._library
 
     @property
     def mcp(self) -> MCPHandler:
         """MCP 处理器"""
+        if self._mcp is None:
+            from .handlers.mcp import MCPHandler
+
+            self._mcp = MCPHandler(self.config)
         return self._mcp
 
     # === 便捷方法（代理到处理器）===
 
     def add_tool(self, source, name=None, dependencies=None):
         """添加工具（代理到 tools.add）"""
-        return self._tools.add(source, name, dependencies)
+        return self.tools.add(source, name, dependencies)
+
+    def add_tools(self, specs):
+        """批量添加工具（代理到 tools.add_many）"""
+        return self.tools.add_many(specs)
 
     def add_skill(self, source, name=None, dependencies=None):
         """添加技能（代理到 skills.add）"""
-        return self._skills.add(source, name, dependencies)
+        return self.skills.add(source, name, dependencies)
 
     def add_library(self, source, name=None):
         """添加资料（代理到 library.add）"""
-        return self._library.add(source, name)
+        return self.library.add(source, name)
 
     def add_mcp_server(self, name, **kwargs):
         """添加 MCP 服务器（代理到 mcp.add）
@@ -134,11 +181,11 @@ class EnvManager:
         连接 MCP 服务器，自动发现 tools。
         详细参数见 MCPHandler.add()
         """
-        return self._mcp.add(name, **kwargs)
+        return self.mcp.add(name, **kwargs)
 
     def add_tool_dependency(self, *packages):
         """添加工具依赖（代理到 tools.add_dependencies）"""
-        return self._tools.add_dependencies(*packages)
+        return self.tools.add_dependencies(*packages)
 
     def init_tool_environment(
         self,
@@ -167,21 +214,110 @@ class EnvManager:
 
         if unique_deps:
             logger.info(f"初始化 tools 环境依赖: {unique_deps}")
-            return self._tools.add_dependencies(*unique_deps)
+            return self.tools.add_dependencies(*unique_deps)
 
         # 仅创建 venv（无依赖）
-        self._tools.ensure_venv(self.config.tools_venv_dir)
+        self.tools.ensure_venv(self.config.tools_venv_dir)
         return self.config.tools_requirements
 
+    def init_environments(
+        self,
+        skills: list[str] | None = None,
+        *,
+        include_tools: bool = True,
+        max_workers: int | None = None,
+    ) -> None:
+        """
+        并行同步 tools 与技能的运行环境（venv + requirements.txt）
+
+        每个环境的 uv venv / uv pip install 都是独立子进程，
+        用线程池同时进行；任一环境失败时取消尚未开始的任务并抛出该异常。
+
+        Args:
+            skills: 要同步的技能名称，默认全部技能
+            include_tools: 是否同时同步 tools 环境
+            max_workers: 线程数，默认 os.cpu_count()
+        """
+        if skills is None:
+            skills = self.skills.list()
+
+        tasks = [partial(self.skills.sync_dependencies, name) for name in skills]
+        if include_tools:
+            tasks.insert(0, self.tools.sync_dependencies)
+        if not tasks:
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            futures = [pool.submit(task) for task in tasks]
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            for future in done:
+                if future.exception() is not None:
+                    raise future.exception()
+
+        logger.info(f"环境同步完成: tools={include_tools}, skills={skills}")
+
     # === 索引生成 ===
 
     def index(self) -> None:
-        """生成所有索引文件"""
-        self._tools.generate_index()
-        self._skills.generate_index()
-        self._library.generate_index()
+        """生成所有索引文件（内容未变化时跳过）"""
+        digest = self._index_fingerprint()
+        if digest is not None and digest == self._index_digest:
+            logger.debug("索引输入未变化，跳过生成")
+            return
+
+        self.tools.generate_index()
+        self.skills.generate_index()
+        self.library.generate_index()
+        # 生成后再取指纹：index.md 此时已存在，指纹本身不包含 index.md
+        self._index_digest = self._index_fingerprint()
         logger.info("索引生成完成")
 
+    def _index_fingerprint(self) -> bytes | None:
+        """
+        计算索引输入的指纹
+
+        基于 tools/skills/library/_mcp 下各条目（以及每个技能的 SKILL.md）
+        的 (name, size, mtime_ns)，只做 scandir + stat，不读取文件内容。
+        任一 index.md 缺失时返回 None，强制重新生成。
+        """
+        index_files = (
+            self.config.tools_dir / "index.md",
+            self.config.skills_dir / "index.md",
+            self.config.library_dir / "index.md",
+        )
+        if not all(f.is_file() for f in index_files):
+            return None
+
+        key = hashlib.blake2b(digest_size=16)
+
+        def update(name: str, st: os.stat_result) -> None:
+            key.update(name.encode("utf-8", "surrogateescape"))
+            key.update(st.st_size.to_bytes(8, "little"))
+            key.update(st.st_mtime_ns.to_bytes(8, "little"))
+
+        for directory in (
+            self.config.tools_dir,
+            self.config.skills_dir,
+            self.config.library_dir,
+            self.config.mcp_config_dir,
+        ):
+            key.update(b"\0" + str(directory).encode("utf-8", "surrogateescape"))
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            for entry in entries:
+                if entry.name == "index.md" or entry.name.startswith("."):
+                    continue
+                update(entry.name, entry.stat())
+                if directory == self.config.skills_dir and entry.is_dir():
+                    for md_name in ("SKILL.md", "skill.md"):
+                        try:
+                            update(md_name, os.stat(os.path.join(entry.path, md_name)))
+                        except FileNotFoundError:
+                            pass
+        return key.digest()
+
     # === 目录路径属性（代理）===
 
     @property
@@ -2,11 +2,31 @@
 配置处理器模块
 
 提供工具、技能、资料库、MCP 的独立管理能力。
+
+各处理器按需导入：MCP 处理器依赖 asyncio，技能处理器解析 frontmatter 时
+才导入 strictyaml，只用到其中一部分的脚本不必为其余模块付出导入开销。
 """
 
-from .tools import ToolsHandler
-from .skills import SkillsHandler
-from .library import LibraryHandler
-from .mcp import MCPHandler
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_getattr
+
+if TYPE_CHECKING:
+    from .library import LibraryHandler
+    from .mcp import MCPHandler
+    from .skills import SkillsHandler
+    from .tools import ToolsHandler
+
+# 导出名 → 定义所在的子模块
+_LAZY_EXPORTS = {
+    "ToolsHandler": ".tools",
+    "SkillsHandler": ".skills",
+    "LibraryHandler": ".library",
+    "MCPHandler": ".mcp",
+}
 
 __all__ = ["ToolsHandler", "SkillsHandler", "LibraryHandler", "MCPHandler"]
+
+__getattr__ = lazy_getattr(__name__, globals(), _LAZY_EXPORTS)
@@ -6,22 +6,232 @@ BaseHandler - 处理器基类
 
 from __future__ import annotations
 
+import functools
 import os
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO, Iterator
 
 from loguru import logger
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@functools.cache
+def _which_uv() -> str:
+    """查找 uv 可执行文件（进程内只查找一次 PATH），找不到时返回 uv 让系统报错"""
+    return shutil.which("uv") or "uv"
+
+
+# Linux FICLONE ioctl（_IOW(0x94, 9, int)），用于 btrfs/xfs 等文件系统的写时复制
+_FICLONE = 0x40049409
+
+
+def _reflink(source: Path, target: Path) -> bool:
+    """尝试以 reflink（写时复制）克隆文件，成功时同步元数据并返回 True"""
+    if fcntl is None:
+        return False
+    created = False
+    try:
+        # O_EXCL：目标已存在（如被并发创建）时放弃克隆，不截断、不删除别人的文件
+        with open(source, "rb") as src, open(target, "xb") as dst:
+            created = True
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except OSError:
+        if created:
+            target.unlink(missing_ok=True)
+        return False
+    shutil.copystat(source, target)
+    return True
+
+
+def link_or_copy(source: str | Path, target: str | Path) -> Path:
+    """
+    把源文件放到配置目录：优先 reflink，否则回退为复制
+
+    在支持 reflink 的文件系统（btrfs/xfs 等）上做写时复制克隆，
+    否则使用 shutil.copy2（内核侧 sendfile 拷贝）。两种方式得到的都是独立文件，
+    之后修改或追加写入目标不会影响源文件，源文件被删除后目标依然有效。
+    签名与 shutil.copy2 兼容，可直接作为 copytree 的 copy_function。
+
+    Args:
+        source: 源文件路径
+        target: 目标文件路径（已存在则覆盖）
+
+    Returns:
+        目标文件路径
+    """
+    source, target = Path(source), Path(target)
+    if target.exists():
+        if os.path.samefile(source, target):
+            return target
+        target.unlink()
+    if not _reflink(source, target):
+        shutil.copy2(source, target)
+    return target
+
+
+# copy_tree 中文件数达到该值时并发放置文件
+_PARALLEL_COPY_THRESHOLD = 16
+_PARALLEL_COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def copy_tree(source: str | Path, target: str | Path) -> Path:
+    """
+    把目录整体放到配置目录，其中的文件逐个交给 link_or_copy
+
+    用 os.scandir 遍历，类型判断复用 DirEntry 自带的信息，不再逐个 stat；
+    先建好全部子目录，文件较多时在线程池中并发放置，
+    在网络文件系统上可掩盖每个文件的往返延迟。
+    与 shutil.copytree 一样跟随符号链接，目标目录不能已存在。
+
+    Args:
+        source: 源目录路径
+        target: 目标目录路径
+
+    Returns:
+        目标目录路径
+    """
+    files: list[tuple[str, str]] = []
+    dirs: list[tuple[str, str]] = []
+    stack = [(os.fspath(source), os.fspath(target))]
+    while stack:
+        src_dir, dst_dir = stack.pop()
+        os.makedirs(dst_dir)
+        dirs.append((src_dir, dst_dir))
+        with os.scandir(src_dir) as it:
+            for entry in it:
+                dst = os.path.join(dst_dir, entry.name)
+                if entry.is_dir():
+                    stack.append((entry.path, dst))
+                else:
+                    files.append((entry.path, dst))
+
+    if len(files) < _PARALLEL_COPY_THRESHOLD:
+        for src, dst in files:
+            link_or_copy(src, dst)
+    else:
+        with ThreadPoolExecutor(max_workers=_PARALLEL_COPY_WORKERS) as pool:
+            # 取出结果以便重新抛出放置过程中的异常
+            list(pool.map(link_or_copy, *zip(*files)))
+
+    # 与 copytree 一致：内容放置完成后再同步目录元数据
+    for src_dir, dst_dir in reversed(dirs):
+        shutil.copystat(src_dir, dst_dir)
+    return Path(target)
+
+
+def remove_tree(path: str | Path) -> bool:
+    """
+    删除目录树，目录不存在时返回 False
+
+    不先 exists() 探测，以 FileNotFoundError 判定不存在。
+    删除本身交给 shutil.rmtree：POSIX 上它已是基于 os.scandir 和目录 fd
+    （unlinkat 相对路径）的实现，类型判断复用 DirEntry，不逐项 stat/islink。
+
+    Args:
+        path: 目录路径
+
+    Returns:
+        是否删除了目录
+    """
+    try:
+        shutil.rmtree(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+# 原子写入使用的缓冲区大小
+_ATOMIC_WRITE_BUFFER = 1 << 20
+
+
+@contextmanager
+def atomic_open(path: Path) -> Iterator[BinaryIO]:
+    """
+    以原子方式写入文件：先写同目录下的临时文件，fsync 后 os.replace 到目标
+
+    写入中途出错或进程崩溃时，原文件保持不变；临时文件以 . 开头，
+    不会被工具列表和索引指纹当作条目。
+
+    Args:
+        path: 目标文件路径
+
+    Yields:
+        带缓冲的二进制文件对象
+    """
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(tmp, "wb", buffering=_ATOMIC_WRITE_BUFFER) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """原子写入整段字节内容，见 atomic_open"""
+    with atomic_open(path) as f:
+        f.write(data)
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """
+    内容与现有文件不同时才原子写入
+
+    内容相同时不触碰文件、mtime 不变，依赖 mtime 的下游缓存
+    （索引指纹、字节码缓存、编辑器和文件监听）不会因此失效。
+    大小不同时不必读取旧内容。
+
+    Returns:
+        是否实际写入
+    """
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    atomic_write_bytes(path, data)
+    return True
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    持有 path 上的独占 flock，跨进程串行化同一资源的构建
+
+    锁文件不存在时创建，释放后保留以便复用；
+    不支持 fcntl 的平台（Windows）上不加锁。
+
+    Args:
+        path: 锁文件路径
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
 
 class BaseHandler:
     """处理器基类，提供共享的 venv 管理能力"""
 
     def _find_uv(self) -> str:
         """查找 uv 可执行文件"""
-        if shutil.which("uv"):
-            return "uv"
-        return "uv"
+        return _which_uv()
 
     def ensure_venv(self, venv_dir: Path) -> None:
         """
@@ -39,7 +249,8 @@ class BaseHandler:
                 [self._find_uv(), "venv", str(venv_dir)],
                 cwd=str(venv_dir.parent),
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
             )
         except FileNotFoundError:
             raise RuntimeError(
@@ -67,11 +278,18 @@ class BaseHandler:
         logger.info(f"安装依赖: {dependencies}")
         try:
             subprocess.run(
-                [self._find_uv(), "pip", "install", *dependencies],
+                [
+                    self._find_uv(),
+                    "pip",
+                    "install",
+                    "--python",
+                    str(venv_dir),
+                    *dependencies,
+                ],
                 cwd=str(work_dir),
-                env={**os.environ, "VIRTUAL_ENV": str(venv_dir)},
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
             )
         except subprocess.CalledProcessError as e:
             logger.error(f"依赖安装失败: {e.stderr.decode() if e.stderr else e}")
@@ -93,11 +311,19 @@ class BaseHandler:
         logger.info(f"从文件安装依赖: {requirements_file}")
         try:
             subprocess.run(
-                [self._find_uv(), "pip", "install", "-r", str(requirements_file)],
+                [
+                    self._find_uv(),
+                    "pip",
+                    "install",
+                    "--python",
+                    str(venv_dir),
+                    "-r",
+                    str(requirements_file),
+                ],
                 cwd=str(requirements_file.parent),
-                env={**os.environ, "VIRTUAL_ENV": str(venv_dir)},
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
             )
         except subprocess.CalledProcessError as e:
             logger.error(f"依赖安装失败: {e.stderr.decode() if e.stderr else e}")
@@ -116,18 +342,23 @@ class BaseHandler:
         if not dependencies:
             return
 
-        # 读取现有依赖
-        existing = set()
+        # 读取现有依赖（忽略空行和注释，注释行允许有前导空白）
+        content = ""
+        existing: set[str] = set()
         if requirements_file.exists():
-            existing = set(
-                line.strip()
-                for line in requirements_file.read_text().split("\n")
-                if line.strip() and not line.startswith("#")
-            )
+            content = requirements_file.read_text()
+            for line in content.splitlines():
+                stripped = line.strip()
+                if stripped and not stripped.startswith("#"):
+                    existing.add(stripped)
 
-        # 添加新依赖
-        existing.update(dependencies)
+        # 只追加尚未记录的依赖，全部已存在时不写文件
+        new = [d for d in dict.fromkeys(dependencies) if d not in existing]
+        if not new:
+            return
 
-        # 写回文件
-        requirements_file.write_text("\n".join(sorted(existing)) + "\n")
+        prefix = "\n" if content and not content.endswith("\n") else ""
+        chunk = prefix + "\n".join(new) + "\n"
+        with requirements_file.open("a") as f:
+            f.write(chunk)
         logger.info(f"保存依赖到: {requirements_file}")
@@ -6,13 +6,14 @@ LibraryHandler - 资料库管理处理器
 
 from __future__ import annotations
 
-import shutil
+import os
 from pathlib import Path
 from typing import Optional
 
 from loguru import logger
 
 from ..envconfig import EnvConfig
+from .base import link_or_copy, write_if_changed
 
 
 class LibraryHandler:
@@ -20,6 +21,9 @@ class LibraryHandler:
 
     def __init__(self, config: EnvConfig):
         self.config = config
+        # 路径在初始化时取一次，各方法直接复用
+        self._library_dir = config.library_dir
+        self._index_path = config.library_dir / "index.md"
 
     def add(self, source: str | Path, name: Optional[str] = None) -> Path:
         """
@@ -39,19 +43,17 @@ class LibraryHandler:
         if name is None:
             name = source.name
 
-        target = self.config.library_dir / name
-        shutil.copy2(source, target)
+        target = self._library_dir / name
+        link_or_copy(source, target)
 
         logger.info(f"添加资料: {name} <- {source}")
         return target
 
     def list(self) -> list[str]:
         """列出所有资料名称"""
-        return [
-            f.name
-            for f in self.config.library_dir.iterdir()
-            if f.is_file() and f.name != "index.md"
-        ]
+        # scandir 的 DirEntry 自带类型信息，普通文件无需额外 stat
+        with os.scandir(self._library_dir) as it:
+            return [e.name for e in it if e.name != "index.md" and e.is_file()]
 
     def remove(self, name: str) -> bool:
         """
@@ -63,7 +65,7 @@ class LibraryHandler:
         Returns:
             是否删除成功
         """
-        target = self.config.library_dir / name
+        target = self._library_dir / name
         if target.exists():
             target.unlink()
             logger.info(f"删除资料: {name}")
@@ -73,13 +75,13 @@ class LibraryHandler:
     def generate_index(self) -> None:
         """生成资料索引 index.md"""
         files = self.list()
+        files.sort()
 
-        content = "# Library\n\n"
         if files:
-            content += "可用资料列表：\n\n"
-            for f in sorted(files):
-                content += f"- `{f}`: 使用 `cat <path_to_library>/{f}` 查看\n"
+            content = "# Library\n\n可用资料列表：\n\n" + "".join(
+                f"- `{f}`: 使用 `cat <path_to_library>/{f}` 查看\n" for f in files
+            )
         else:
-            content += "_暂无资料_\n"
+            content = "# Library\n\n_暂无资料_\n"
 
-        (self.config.library_dir / "index.md").write_text(content, encoding="utf-8")
+        write_if_changed(self._index_path, content.encode("utf-8"))
@@ -5,23 +5,342 @@ MCPHandler - MCP 服务器管理处理器
 并映射到 AEP 的目录结构中：
   - tools → tools/{name}.py (stub 文件)
 
-每次工具调用都会 spawn 一个新的连接。
+stub 在同一进程内复用一个后台事件循环和 MCP 会话，
+连接只在首次调用时建立，进程退出时关闭。
 """
 
 from __future__ import annotations
 
 import asyncio
+import functools
+import io
 import json
+import keyword
+import os
+import re
 import shutil
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from enum import Enum
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Any, AsyncIterator, Optional
 
 from loguru import logger
 
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库 json
+    orjson = None
+
 from ..envconfig import EnvConfig, MCPServerConfig
-from .base import BaseHandler
+from .base import BaseHandler, atomic_write_bytes, remove_tree, write_if_changed
+
+
+@functools.cache
+def _mcp_client() -> SimpleNamespace:
+    """导入 mcp SDK 客户端组件（仅首次调用时导入，之后直接复用）
+
+    不在模块顶层导入：mcp 及其依赖导入耗时较长，
+    只需 MCPTransport 或配置读写时不必付出这部分开销。
+    """
+    try:
+        import httpx
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+        from mcp.client.streamable_http import streamable_http_client
+    except ImportError as e:
+        raise RuntimeError(f"连接 MCP 服务器需要 mcp SDK: pip install mcp ({e})")
+
+    return SimpleNamespace(
+        httpx=httpx,
+        ClientSession=ClientSession,
+        StdioServerParameters=StdioServerParameters,
+        stdio_client=stdio_client,
+        streamable_http_client=streamable_http_client,
+    )
+
+
+def _escape_docstring(text: str) -> str:
+    """转义写入生成代码 docstring 的文本（反斜杠与三引号），保证 stub 可编译"""
+    return text.replace("\\", "\\\\").replace('"""', '\\"\\"\\"')
+
+
+def _recorded_tools(
+    previous: Optional[MCPServerConfig], current: MCPServerConfig
+) -> Optional[list[dict]]:
+    """连接参数未变且已记录工具时返回记录，否则返回 None（需要重新发现）"""
+    if previous is not None and previous.tools and _same_connection(previous, current):
+        return previous.tools
+    return None
+
+
+def _same_connection(a: MCPServerConfig, b: MCPServerConfig) -> bool:
+    """两份配置的连接参数（不含已发现的工具）是否相同"""
+    return (
+        a.transport == b.transport
+        and a.command == b.command
+        and a.env == b.env
+        and a.url == b.url
+        and a.headers == b.headers
+    )
+
+
+def _python_name(name: str, reserved: frozenset[str], seen: set[str]) -> str:
+    """把 MCP 工具名/参数名转换为合法且不重复的 Python 标识符，并记入 seen
+
+    非法字符替换为下划线，数字开头时加前缀，关键字后加下划线；
+    仍与 reserved 或 seen 冲突时依次追加 _2、_3……
+    """
+    safe = _IDENT_RE.sub("_", name)
+    if not safe.isidentifier():
+        safe = f"_{safe}"
+    if keyword.iskeyword(safe):
+        safe += "_"
+    candidate, n = safe, 1
+    while candidate in reserved or candidate in seen:
+        n += 1
+        candidate = f"{safe}_{n}"
+    seen.add(candidate)
+    return candidate
+
+
+def _dump_config(data: Any) -> bytes:
+    """序列化服务器配置（或名称索引）为 UTF-8 JSON（两空格缩进）"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _load_config(raw: bytes) -> Any:
+    """解析服务器配置（或名称索引）JSON"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# 服务器名称索引（位于 _mcp/ 下；点号开头，不会与服务器目录重名）
+_INDEX_FILE = ".index.json"
+
+# 扫描服务器目录时，数量达到该值则并发检查 config.json
+_PARALLEL_STAT_THRESHOLD = 32
+_PARALLEL_STAT_WORKERS = 16
+
+# 常见 MCP 启动命令缺失时的安装提示
+_INSTALL_HINTS = {
+    "npx": "请安装 Node.js: https://nodejs.org/",
+    "node": "请安装 Node.js: https://nodejs.org/",
+    "uv": "请安装 uv: https://docs.astral.sh/uv/getting-started/installation/",
+    "python": "请安装 Python: https://www.python.org/downloads/",
+    "uvx": "请安装 uv: https://docs.astral.sh/uv/getting-started/installation/",
+}
+
+# JSON Schema 类型 → stub 函数签名中的 Python 类型注解
+_JSON_TO_PY_TYPES = {
+    "string": "str",
+    "integer": "int",
+    "boolean": "bool",
+    "number": "float",
+    "object": "dict",
+    "array": "list",
+}
+
+# 工具名/参数名中不能出现在 Python 标识符里的字符
+_IDENT_RE = re.compile(r"\W")
+
+# stub 模块中已占用的名称（导入、连接模板与运行时定义的全部模块级名称），
+# 生成的工具函数不能与之同名，否则会覆盖运行时（如 _invoke 自我递归、_connect 失效）
+_STUB_RESERVED_NAMES = frozenset({
+    # 导入
+    "asyncio", "atexit", "threading", "asynccontextmanager", "httpx",
+    "ClientSession", "StdioServerParameters", "stdio_client",
+    "streamable_http_client",
+    # 连接模板
+    "_SERVER_PARAMS", "_MCP_URL", "_MCP_HEADERS", "_connect",
+    # 会话运行时
+    "_loop", "_session", "_session_task", "_stop", "_lock",
+    "_session_main", "_open_session", "_get_session", "_shutdown",
+    "_call_mcp", "_invoke", "_async_call_mcp", "call",
+})
+
+# 工具函数体内使用的名称，参数不能与之同名
+_METHOD_RESERVED_NAMES = frozenset({"_args", "_invoke"})
+
+# ==================== Stub 模板 ====================
+
+# stub 文件的固定部分：导入、会话复用运行时和通用调用入口
+_STUB_IMPORTS = '''
+
+import asyncio
+import atexit
+import threading
+from mcp import ClientSession
+
+'''
+
+# stub 模块 docstring：有已发现工具时列出工具，否则提示通用入口
+_STUB_DOC_TEMPLATE = string.Template('''"""
+MCP Server ($transport): $name
+
+可用工具:
+$tools_doc
+"""''')
+
+_STUB_DOC_GENERIC = string.Template('''"""
+MCP Server ($transport): $name
+
+使用 call(tool_name, **kwargs) 调用 MCP 工具
+"""''')
+
+# 各 transport 的 _connect() 实现，参数以 Python 字面量代入
+_STDIO_CONNECT_TEMPLATE = string.Template('''
+from contextlib import asynccontextmanager
+from mcp import StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+_SERVER_PARAMS = StdioServerParameters(
+    command=$command,
+    args=$args,
+    env=$env or None,
+)
+
+
+@asynccontextmanager
+async def _connect():
+    """建立 STDIO 连接"""
+    async with stdio_client(_SERVER_PARAMS) as streams:
+        yield streams
+''')
+
+_HTTP_CONNECT_TEMPLATE = string.Template('''
+from contextlib import asynccontextmanager
+import httpx
+from mcp.client.streamable_http import streamable_http_client
+
+_MCP_URL = $url
+_MCP_HEADERS = $headers
+
+
+@asynccontextmanager
+async def _connect():
+    """建立 Streamable HTTP 连接"""
+    async with httpx.AsyncClient(headers=_MCP_HEADERS or None) as http_client:
+        async with streamable_http_client(_MCP_URL, http_client=http_client) as (read, write, _):
+            yield (read, write)
+''')
+
+_STUB_RUNTIME = '''
+
+# 同一进程内复用一个后台事件循环和一个 MCP 会话
+_loop = None
+_session = None
+_session_task = None
+_stop = None
+_lock = threading.Lock()
+
+
+async def _session_main(ready, stop):
+    """持有连接的常驻任务：建立会话后等待关闭信号
+
+    连接的进入与退出必须在同一个任务中完成（anyio 的要求）。
+    """
+    try:
+        async with _connect() as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                ready.set_result(session)
+                await stop.wait()
+    except BaseException as e:
+        if not ready.done():
+            ready.set_exception(e)
+
+
+async def _open_session():
+    global _session_task, _stop
+    _stop = asyncio.Event()
+    ready = asyncio.get_running_loop().create_future()
+    _session_task = asyncio.create_task(_session_main(ready, _stop))
+    return await ready
+
+
+def _get_session():
+    """获取（必要时建立）共享会话"""
+    global _loop, _session
+    with _lock:
+        if _session is None or _session_task.done():
+            if _loop is None:
+                _loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=_loop.run_forever, name="mcp-stub-loop", daemon=True
+                ).start()
+            _session = asyncio.run_coroutine_threadsafe(_open_session(), _loop).result()
+        return _session
+
+
+def _shutdown():
+    """进程退出时关闭会话和事件循环"""
+    if _loop is None:
+        return
+    if _session_task is not None and not _session_task.done():
+
+        async def _close():
+            _stop.set()
+            await _session_task
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close(), _loop).result(timeout=5)
+        except Exception:
+            pass
+    _loop.call_soon_threadsafe(_loop.stop)
+
+
+atexit.register(_shutdown)
+
+
+def _call_mcp(tool_name: str, arguments: dict):
+    """调用 MCP 工具（复用同一连接），值为 None 的参数不发送"""
+    return _invoke(tool_name, {k: v for k, v in arguments.items() if v is not None})
+
+
+def _invoke(tool_name: str, arguments: dict):
+    """直接发送已整理好的参数（生成的工具函数使用）"""
+    session = _get_session()
+    return asyncio.run_coroutine_threadsafe(
+        _async_call_mcp(session, tool_name, arguments), _loop
+    ).result()
+
+
+async def _async_call_mcp(session, tool_name: str, arguments: dict):
+    """通过已建立的会话调用工具"""
+    result = await session.call_tool(tool_name, arguments)
+
+    # 提取结果文本
+    texts = []
+    for content in result.content:
+        if hasattr(content, "text"):
+            texts.append(content.text)
+        elif hasattr(content, "data"):
+            texts.append(str(content.data))
+
+    return "\\n".join(texts) if texts else None
+
+
+def call(tool_name: str, **kwargs):
+    """
+    调用 MCP 工具（通用入口）
+
+    Args:
+        tool_name: 工具名称
+        **kwargs: 工具参数
+
+    Returns:
+        工具返回结果
+    """
+    return _call_mcp(tool_name, kwargs)
+
+'''
 
 
 class MCPTransport(Enum):
@@ -45,6 +364,13 @@ class MCPHandler(BaseHandler):
 
     def __init__(self, config: EnvConfig):
         self.config = config
+        # 前置命令查找结果缓存（command → 可执行文件路径），避免重复遍历 PATH
+        self._which_cache: dict[str, str] = {}
+        # 工具定义（规范化 JSON）→ 生成的函数代码
+        self._method_cache: dict[str, str] = {}
+        # 发现能力用的事件循环，首次连接时在后台线程启动，多次 add/refresh 复用
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
 
     # ==================== Public API ====================
 
@@ -61,12 +387,14 @@ class MCPHandler(BaseHandler):
         headers: Optional[dict[str, str]] = None,
         # 通用参数
         transport: MCPTransport = MCPTransport.STDIO,
+        force: bool = False,
     ) -> Path:
         """
         添加 MCP 服务器
 
         连接到 MCP 服务器，自动发现 tools，
-        并生成对应的 stub 文件。
+        并生成对应的 stub 文件。发现的工具会记录在 config.json 中；
+        再次以相同连接参数添加时直接复用，不再连接服务器。
 
         Args:
             name: 服务器名称（将作为工具模块名，推荐用下划线命名）
@@ -76,6 +404,7 @@ class MCPHandler(BaseHandler):
             url: HTTP 模式服务 URL
             headers: HTTP 模式请求头
             transport: 传输方式，默认 STDIO
+            force: 忽略已记录的工具，强制重新连接发现
 
         Returns:
             生成的工具 stub 文件路径
@@ -97,13 +426,101 @@ class MCPHandler(BaseHandler):
                 url="http://localhost:8000/mcp",
             )
         """
+        previous = None if force else self.get_config(name)
+        transport, mcp_config = self._prepare(
+            name,
+            command=command,
+            args=args,
+            env=env,
+            url=url,
+            headers=headers,
+            transport=transport,
+            previous=previous,
+        )
+
+        # 连接参数未变且已记录过工具：跳过连接，直接复用
+        tools = _recorded_tools(previous, mcp_config)
+        if tools is not None:
+            logger.info(f"MCP 服务器配置未变化，复用已发现的工具: {name}")
+            return self._finish_add(name, transport, mcp_config, {"tools": tools})
+
+        # 4. 连接并发现能力
+        logger.info(f"连接 MCP 服务器: {name} ({transport.value})")
+        try:
+            discovered = self._run(self._discover(name, transport, mcp_config))
+        except Exception as e:
+            logger.error(f"MCP 服务器连接/发现失败: {e}")
+            raise RuntimeError(
+                f"无法连接到 MCP 服务器 '{name}': {e}\n"
+                f"请确认服务器配置正确且可以正常启动。"
+            )
+
+        return self._finish_add(name, transport, mcp_config, discovered)
+
+    def add_many(self, specs: list[dict[str, Any]]) -> list[Path]:
+        """
+        批量添加 MCP 服务器
+
+        各服务器的连接与发现并发进行，总耗时取决于最慢的一个。
+
+        Args:
+            specs: 每项为 add() 的关键字参数字典，必须包含 "name"；
+                已记录工具且连接参数未变的服务器不再连接（可用 "force" 覆盖）
+
+        Returns:
+            成功添加的 stub 文件路径，顺序与 specs 一致
+
+        Raises:
+            ValueError: 参数不合法或多个 spec 使用同一名称（不保存任何配置）
+            RuntimeError: 有服务器连接/发现失败（其余服务器仍会添加完成）
+        """
+        # 先校验全部 spec（参数与前置工具），任一不合法时不连接、不保存
+        entries = []
+        recorded: dict[str, list[dict]] = {}
+        seen: set[str] = set()
+        for spec in specs:
+            spec = dict(spec)
+            force = spec.pop("force", False)
+            name = spec["name"]
+            # 发现结果按名称归并，同名服务器会相互覆盖
+            if name in seen:
+                raise ValueError(f"MCP 服务器名称重复: {name}")
+            seen.add(name)
+            previous = None if force else self.get_config(name)
+            transport, mcp_config = self._prepare(**spec, previous=previous)
+            tools = _recorded_tools(previous, mcp_config)
+            if tools is not None:
+                recorded[name] = tools
+            entries.append((name, transport, mcp_config))
+
+        pending = [e[0] for e in entries if e[0] not in recorded]
+        logger.info(f"并发连接 {len(pending)} 个 MCP 服务器: {pending}")
+        return self._discover_and_generate(entries, recorded)
+
+    def _prepare(
+        self,
+        name: str,
+        *,
+        command: Optional[str] = None,
+        args: Optional[list[str]] = None,
+        env: Optional[dict[str, str]] = None,
+        url: Optional[str] = None,
+        headers: Optional[dict[str, str]] = None,
+        transport: MCPTransport = MCPTransport.STDIO,
+        previous: Optional[MCPServerConfig] = None,
+    ) -> tuple[MCPTransport, MCPServerConfig]:
+        """校验参数、检查前置工具并构建服务器配置（add 的第 1~3 步）
+
+        只构建不写盘，配置在 _finish_add 中与 stub 一起保存；
+        连接参数与 previous 相同时保留已记录的工具。
+        """
         self._validate_transport_args(transport, command=command, url=url)
 
         # 2. 检查前置工具
         if transport == MCPTransport.STDIO:
             self._check_prerequisites(command)
 
-        # 3. 保存服务器配置
+        # 3. 构建服务器配置
         mcp_config = MCPServerConfig(
             name=name,
             transport=transport.value,
@@ -113,53 +530,132 @@ class MCPHandler(BaseHandler):
             headers=headers or {},
             tools=[],  # 将在发现后更新
         )
+        mcp_config.tools = _recorded_tools(previous, mcp_config) or []
+        return transport, mcp_config
 
-        config_dir = self.config.mcp_config_path(name)
+    def _write_config(self, mcp_config: MCPServerConfig) -> None:
+        """写入 _mcp/{name}/config.json"""
+        config_dir = self.config.mcp_config_path(mcp_config.name)
         config_dir.mkdir(parents=True, exist_ok=True)
         config_file = config_dir / "config.json"
-        config_file.write_text(
-            json.dumps(mcp_config.to_dict(), indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
+        write_if_changed(config_file, _dump_config(mcp_config.to_dict()))
 
-        # 4. 连接并发现能力
-        logger.info(f"连接 MCP 服务器: {name} ({transport.value})")
-        try:
-            discovered = asyncio.run(self._discover(name, transport, mcp_config))
-        except Exception as e:
-            logger.error(f"MCP 服务器连接/发现失败: {e}")
-            raise RuntimeError(
-                f"无法连接到 MCP 服务器 '{name}': {e}\n"
-                f"请确认服务器配置正确且可以正常启动。"
-            )
+    def _finish_add(
+        self,
+        name: str,
+        transport: MCPTransport,
+        mcp_config: MCPServerConfig,
+        discovered: dict[str, list[dict]],
+    ) -> Path:
+        """保存配置（含发现的工具）并生成 stub（add 的第 5 步，批量添加/刷新共用）
 
+        发现成功后才写 config.json，连接失败的服务器不会留下配置。
+        """
         tools_info = discovered.get("tools", [])
 
+        # 发现的工具写入 config.json，供下次 add 复用；内容不变时不重写
+        mcp_config.tools = tools_info
+        self._write_config(mcp_config)
+        self._update_index(name, present=True)
+
         # 5. 生成 tool stub
         stub_file = self._generate_stub(name, transport, mcp_config, tools_info)
 
         logger.info(
-            f"MCP 服务器添加完成: {name} (发现 {len(tools_info)} 个工具)"
+            f"MCP 服务器 stub 已生成: {name} (发现 {len(tools_info)} 个工具)"
         )
         return stub_file
 
     def list(self) -> list[str]:
-        """列出所有 MCP 服务器名称"""
-        if not self.config.mcp_config_dir.exists():
+        """列出所有 MCP 服务器名称
+
+        优先读取 add/remove 时维护的 _mcp/.index.json，只需一次读取；
+        索引缺失或损坏时回退为扫描目录，并据此重建索引。
+        """
+        names = self._read_index()
+        if names is not None:
+            return names
+
+        names = self._scan_servers()
+        if names:
+            try:
+                self._write_index(names)
+            except OSError as e:
+                logger.debug(f"无法写入 MCP 服务器索引: {e}")
+        return names
+
+    def _scan_servers(self) -> list[str]:
+        """扫描 _mcp/ 下含 config.json 的服务器目录
+
+        服务器较多时并发检查各自的 config.json，
+        在网络文件系统上可掩盖每次 stat 的往返延迟。
+        """
+        try:
+            with os.scandir(self.config.mcp_config_dir) as it:
+                dirs = [e for e in it if e.is_dir()]
+        except FileNotFoundError:
             return []
-        return [
-            d.name
-            for d in self.config.mcp_config_dir.iterdir()
-            if d.is_dir() and (d / "config.json").exists()
-        ]
+
+        config_files = [os.path.join(e.path, "config.json") for e in dirs]
+        if len(dirs) < _PARALLEL_STAT_THRESHOLD:
+            found = map(os.path.exists, config_files)
+        else:
+            with ThreadPoolExecutor(max_workers=_PARALLEL_STAT_WORKERS) as pool:
+                found = list(pool.map(os.path.exists, config_files))
+        return sorted(e.name for e, ok in zip(dirs, found) if ok)
+
+    def _read_index(self) -> Optional[list[str]]:
+        """读取服务器名称索引，缺失或格式不对时返回 None"""
+        try:
+            raw = (self.config.mcp_config_dir / _INDEX_FILE).read_bytes()
+            names = _load_config(raw)
+        except (FileNotFoundError, ValueError):
+            return None
+        if not isinstance(names, list):
+            return None
+        return names
+
+    def _write_index(self, names: list[str]) -> None:
+        """原子写入服务器名称索引（按名称排序）"""
+        atomic_write_bytes(
+            self.config.mcp_config_dir / _INDEX_FILE, _dump_config(sorted(names))
+        )
+
+    def _update_index(self, name: str, *, present: bool) -> None:
+        """在索引中加入/移除一个服务器名称，内容不变时不写文件"""
+        names = self._read_index()
+        if names is None:
+            # 索引缺失：以当前目录状态为准重建
+            names = self._scan_servers()
+        elif (name in names) == present:
+            return
+
+        updated = set(names)
+        if present:
+            updated.add(name)
+        else:
+            updated.discard(name)
+        self._write_index(list(updated))
 
     def get_config(self, name: str) -> Optional[MCPServerConfig]:
         """获取 MCP 服务器配置"""
+        raw = self._read_config_bytes(name)
+        if raw is None:
+            return None
+        return self._parse_config(raw)
+
+    def _read_config_bytes(self, name: str) -> Optional[bytes]:
+        """读取 config.json 原始内容，不存在时返回 None（单次 open，不先 stat）"""
         config_file = self.config.mcp_config_path(name) / "config.json"
-        if not config_file.exists():
+        try:
+            return config_file.read_bytes()
+        except FileNotFoundError:
             return None
-        data = json.loads(config_file.read_text(encoding="utf-8"))
-        return MCPServerConfig.from_dict(data)
+
+    @staticmethod
+    def _parse_config(raw: bytes) -> MCPServerConfig:
+        """解析 config.json 内容"""
+        return MCPServerConfig.from_dict(_load_config(raw))
 
     def remove(self, name: str) -> bool:
         """删除 MCP 服务器（包括 stub 和配置）"""
@@ -173,38 +669,127 @@ class MCPHandler(BaseHandler):
 
         # 删除 MCP 配置目录
         config_dir = self.config.mcp_config_path(name)
-        if config_dir.exists():
-            shutil.rmtree(config_dir)
+        if remove_tree(config_dir):
             removed = True
+        self._update_index(name, present=False)
 
         if removed:
             logger.info(f"删除 MCP 服务器: {name}")
         return removed
 
     def refresh(self, name: str) -> Path:
-        """重新连接 MCP 服务器，刷新发现的能力"""
-        config = self.get_config(name)
-        if config is None:
+        """重新连接 MCP 服务器，刷新发现的能力
+
+        config.json 只读取、解析一次，解析结果同时用于发现和生成 stub。
+        """
+        raw = self._read_config_bytes(name)
+        if raw is None:
             raise FileNotFoundError(f"MCP 服务器不存在: {name}")
+        config = self._parse_config(raw)
 
         transport = MCPTransport(config.transport)
 
         # 重新发现
         logger.info(f"刷新 MCP 服务器: {name}")
-        discovered = asyncio.run(self._discover(name, transport, config))
+        discovered = self._run(self._discover(name, transport, config))
 
-        tools_info = discovered.get("tools", [])
+        # 更新记录的工具并重新生成 stub
+        return self._finish_add(name, transport, config, discovered)
 
-        # 重新生成 stub
-        stub_file = self._generate_stub(name, transport, config, tools_info)
+    def close(self) -> None:
+        """停止并关闭复用的事件循环"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+            self._loop = None
+            self._loop_thread = None
 
-        logger.info(
-            f"MCP 服务器刷新完成: {name} (发现 {len(tools_info)} 个工具)"
-        )
-        return stub_file
+    def refresh_all(self) -> list[Path]:
+        """
+        并发刷新所有已配置的 MCP 服务器
+
+        Returns:
+            成功刷新的 stub 文件路径，顺序与 list() 一致
+
+        Raises:
+            RuntimeError: 有服务器连接/发现失败（其余服务器仍会刷新完成）
+        """
+        entries = []
+        for name in self.list():
+            raw = self._read_config_bytes(name)
+            if raw is None:
+                continue
+            config = self._parse_config(raw)
+            entries.append((name, MCPTransport(config.transport), config))
+
+        logger.info(f"并发刷新 {len(entries)} 个 MCP 服务器")
+        return self._discover_and_generate(entries)
 
     # ==================== Discovery ====================
 
+    def _run(self, coro: Any) -> Any:
+        """在后台线程的复用事件循环中运行协程并等待结果
+
+        事件循环常驻独立线程，调用方线程已有运行中的事件循环
+        （Jupyter、FastAPI 等）时也能同步调用。
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(
+                target=self._loop.run_forever, name="mcp-discover-loop", daemon=True
+            )
+            self._loop_thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _discover_and_generate(
+        self,
+        entries: list[tuple[str, MCPTransport, MCPServerConfig]],
+        recorded: Optional[dict[str, list[dict]]] = None,
+    ) -> list[Path]:
+        """并发发现多个服务器，为成功的生成 stub，失败的汇总后抛出 RuntimeError
+
+        recorded 中的服务器直接使用已记录的工具，不参与连接。
+        """
+        recorded = recorded or {}
+        pending = [e for e in entries if e[0] not in recorded]
+        discovered_by_name = dict(
+            zip((e[0] for e in pending), self._run(self._discover_many(pending)))
+        )
+
+        stubs: list[Path] = []
+        failures: list[str] = []
+        for name, transport, mcp_config in entries:
+            if name in recorded:
+                discovered = {"tools": recorded[name]}
+            else:
+                discovered = discovered_by_name[name]
+            if isinstance(discovered, BaseException):
+                logger.error(f"MCP 服务器连接/发现失败: {name}: {discovered}")
+                failures.append(f"{name}: {discovered}")
+                continue
+            stubs.append(self._finish_add(name, transport, mcp_config, discovered))
+
+        if failures:
+            raise RuntimeError(
+                "无法连接到以下 MCP 服务器:\n"
+                + "\n".join(failures)
+                + "\n请确认服务器配置正确且可以正常启动。"
+            )
+        return stubs
+
+    async def _discover_many(
+        self, entries: list[tuple[str, MCPTransport, MCPServerConfig]]
+    ) -> list[Any]:
+        """并发发现多个服务器，结果与 entries 一一对应（失败项为异常对象）"""
+        return await asyncio.gather(
+            *(
+                self._discover(name, transport, mcp_config)
+                for name, transport, mcp_config in entries
+            ),
+            return_exceptions=True,
+        )
+
     async def _discover(
         self,
         name: str,
@@ -217,55 +802,58 @@ class MCPHandler(BaseHandler):
         Returns:
             {"tools": [...]} 
         """
-        from mcp import ClientSession
-
+        client = _mcp_client()
         result: dict[str, list[dict]] = {"tools": []}
 
         async with self._connect(transport, config) as (read, write):
-            async with ClientSession(read, write) as session:
+            async with client.ClientSession(read, write) as session:
                 await session.initialize()
                 result = await self._fetch_tools(session)
 
         return result
 
-    @asynccontextmanager
-    async def _connect(
+    def _connect(
         self,
         transport: MCPTransport,
         config: MCPServerConfig,
-    ) -> AsyncIterator[tuple[Any, Any]]:
-        """统一连接抽象：根据 transport 建立会话流。"""
-        match transport:
-            case MCPTransport.STDIO:
-                from mcp import StdioServerParameters
-                from mcp.client.stdio import stdio_client
-
-                server_params = StdioServerParameters(
-                    command=config.command[0] if config.command else "",
-                    args=config.command[1:]
-                    if config.command and len(config.command) > 1
-                    else [],
-                    env=config.env if config.env else None,
-                )
+    ) -> Any:
+        """统一连接抽象：根据 transport 建立会话流（返回异步上下文管理器）。"""
+        connect = self._CONNECTORS.get(transport)
+        if connect is None:
+            raise ValueError(f"不支持的 MCP transport: {transport.value}")
+        return connect(self, config)
 
-                async with stdio_client(server_params) as streams:
-                    yield streams
-
-            case MCPTransport.HTTP:
-                import httpx
-                from mcp.client.streamable_http import streamable_http_client
+    @asynccontextmanager
+    async def _connect_stdio(
+        self, config: MCPServerConfig
+    ) -> AsyncIterator[tuple[Any, Any]]:
+        """建立 STDIO 会话流"""
+        client = _mcp_client()
+        server_params = client.StdioServerParameters(
+            command=config.command[0] if config.command else "",
+            args=config.command[1:]
+            if config.command and len(config.command) > 1
+            else [],
+            env=config.env if config.env else None,
+        )
 
-                async with httpx.AsyncClient(
-                    headers=config.headers if config.headers else None
-                ) as http_client:
-                    async with streamable_http_client(
-                        config.url or "",
-                        http_client=http_client,
-                    ) as (read, write, _):
-                        yield (read, write)
+        async with client.stdio_client(server_params) as streams:
+            yield streams
 
-            case _:
-                raise ValueError(f"不支持的 MCP transport: {transport.value}")
+    @asynccontextmanager
+    async def _connect_http(
+        self, config: MCPServerConfig
+    ) -> AsyncIterator[tuple[Any, Any]]:
+        """建立 Streamable HTTP 会话流"""
+        client = _mcp_client()
+        async with client.httpx.AsyncClient(
+            headers=config.headers if config.headers else None
+        ) as http_client:
+            async with client.streamable_http_client(
+                config.url or "",
+                http_client=http_client,
+            ) as (read, write, _):
+                yield (read, write)
 
     async def _fetch_tools(self, session: Any) -> dict[str, list[dict]]:
         """从已连接的 session 中获取 tools"""
@@ -274,16 +862,14 @@ class MCPHandler(BaseHandler):
         # 获取工具列表
         try:
             tools_result = await session.list_tools()
-            for tool in tools_result.tools:
-                tools.append(
-                    {
-                        "name": tool.name,
-                        "description": tool.description or "",
-                        "inputSchema": tool.inputSchema
-                        if hasattr(tool, "inputSchema")
-                        else {},
-                    }
-                )
+            tools = [
+                {
+                    "name": tool.name,
+                    "description": tool.description or "",
+                    "inputSchema": getattr(tool, "inputSchema", None) or {},
+                }
+                for tool in tools_result.tools
+            ]
         except Exception as e:
             logger.warning(f"获取工具列表失败: {e}")
 
@@ -291,19 +877,24 @@ class MCPHandler(BaseHandler):
 
     # ==================== Prerequisites ====================
 
+    def refresh_prerequisites(self) -> None:
+        """清空前置命令查找缓存（安装或卸载命令后调用）"""
+        self._which_cache.clear()
+
     def _check_prerequisites(self, command: str) -> None:
-        """检查运行 MCP 服务器所需的前置工具"""
-        if not shutil.which(command):
-            hints = {
-                "npx": "请安装 Node.js: https://nodejs.org/",
-                "node": "请安装 Node.js: https://nodejs.org/",
-                "uv": "请安装 uv: https://docs.astral.sh/uv/getting-started/installation/",
-                "python": "请安装 Python: https://www.python.org/downloads/",
-                "uvx": "请安装 uv: https://docs.astral.sh/uv/getting-started/installation/",
-            }
-            hint = hints.get(command, f"请确保 '{command}' 已安装并在 PATH 中")
+        """检查运行 MCP 服务器所需的前置工具
+
+        找到的命令路径会被缓存；未找到的不缓存，安装后重试即可生效。
+        """
+        if command in self._which_cache:
+            return
+
+        path = shutil.which(command)
+        if not path:
+            hint = _INSTALL_HINTS.get(command, f"请确保 '{command}' 已安装并在 PATH 中")
             raise RuntimeError(f"未找到命令 '{command}'。{hint}")
 
+        self._which_cache[command] = path
         logger.debug(f"前置检查通过: {command}")
 
     # ==================== Stub Generation ====================
@@ -326,71 +917,21 @@ class MCPHandler(BaseHandler):
         # 构建 docstring
         if tools_info:
             tools_doc = "\n".join(
-                f"  - {t['name']}: {t.get('description', '')}" for t in tools_info
-            )
-            docstring = (
-                f'"""\n'
-                f"MCP Server ({transport.value}): {name}\n\n"
-                f"可用工具:\n{tools_doc}\n"
-                f'"""'
+                f"  - {t['name']}: {_escape_docstring(t.get('description', ''))}"
+                for t in tools_info
             )
         else:
-            docstring = (
-                f'"""\n'
-                f"MCP Server ({transport.value}): {name}\n\n"
-                f"使用 call(tool_name, **kwargs) 调用 MCP 工具\n"
-                f'"""'
-            )
-
-        stub_content = f'''{docstring}
-
-import asyncio
-from mcp import ClientSession
-
-{connect_code}
-
-
-def _call_mcp(tool_name: str, arguments: dict):
-    """调用 MCP 工具（每次 spawn 新连接）"""
-    return asyncio.run(_async_call_mcp(tool_name, arguments))
-
-
-async def _async_call_mcp(tool_name: str, arguments: dict):
-    """异步连接 MCP 服务器并调用工具"""
-    async with _connect() as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-            result = await session.call_tool(tool_name, arguments)
-
-            # 提取结果文本
-            texts = []
-            for content in result.content:
-                if hasattr(content, "text"):
-                    texts.append(content.text)
-                elif hasattr(content, "data"):
-                    texts.append(str(content.data))
-
-            return "\\n".join(texts) if texts else None
-
-
-def call(tool_name: str, **kwargs):
-    """
-    调用 MCP 工具（通用入口）
-
-    Args:
-        tool_name: 工具名称
-        **kwargs: 工具参数
-
-    Returns:
-        工具返回结果
-    """
-    return _call_mcp(tool_name, {{k: v for k, v in kwargs.items() if v is not None}})
-
-{methods_code}
-'''
+            tools_doc = ""
+        docstring = (_STUB_DOC_TEMPLATE if tools_info else _STUB_DOC_GENERIC).substitute(
+            transport=transport.value, name=name, tools_doc=tools_doc
+        )
 
+        # 内容未变化时不重写（refresh 时常见），保留 mtime 和字节码缓存
         stub_file = self.config.tool_path(name)
-        stub_file.write_text(stub_content, encoding="utf-8")
+        content = "".join(
+            (docstring, _STUB_IMPORTS, connect_code, _STUB_RUNTIME, methods_code, "\n")
+        )
+        write_if_changed(stub_file, content.encode("utf-8"))
         return stub_file
 
     def _build_connect_code(
@@ -399,142 +940,163 @@ def call(tool_name: str, **kwargs):
         config: MCPServerConfig,
     ) -> str:
         """统一连接代码构建入口。"""
-        match transport:
-            case MCPTransport.STDIO:
-                return self._build_stdio_connect_code(config)
-            case MCPTransport.HTTP:
-                return self._build_http_connect_code(config)
-            case _:
-                raise ValueError(f"不支持的 MCP transport: {transport.value}")
+        build = self._CONNECT_CODE_BUILDERS.get(transport)
+        if build is None:
+            raise ValueError(f"不支持的 MCP transport: {transport.value}")
+        return build(self, config)
 
     def _build_stdio_connect_code(self, config: MCPServerConfig) -> str:
         """生成 STDIO 连接代码"""
         command = config.command[0] if config.command else ""
-        args = json.dumps(config.command[1:] if config.command else [])
-        env = json.dumps(config.env or {})
-
-        return f'''
-from contextlib import asynccontextmanager
-from mcp import StdioServerParameters
-from mcp.client.stdio import stdio_client
-
-_SERVER_PARAMS = StdioServerParameters(
-    command={json.dumps(command)},
-    args={args},
-    env={env} or None,
-)
-
-
-@asynccontextmanager
-async def _connect():
-    """建立 STDIO 连接"""
-    async with stdio_client(_SERVER_PARAMS) as streams:
-        yield streams
-'''
+        return _STDIO_CONNECT_TEMPLATE.substitute(
+            command=repr(command),
+            args=repr(list(config.command[1:] if config.command else [])),
+            env=repr(dict(config.env or {})),
+        )
 
     def _build_http_connect_code(self, config: MCPServerConfig) -> str:
         """生成 HTTP (Streamable HTTP) 连接代码"""
-        url = json.dumps(config.url or "")
-        headers = json.dumps(config.headers or {})
-
-        return f'''
-from contextlib import asynccontextmanager
-import httpx
-from mcp.client.streamable_http import streamable_http_client
-
-_MCP_URL = {url}
-_MCP_HEADERS = {headers}
-
-
-@asynccontextmanager
-async def _connect():
-    """建立 Streamable HTTP 连接"""
-    async with httpx.AsyncClient(headers=_MCP_HEADERS or None) as http_client:
-        async with streamable_http_client(_MCP_URL, http_client=http_client) as (read, write, _):
-            yield (read, write)
-'''
+        return _HTTP_CONNECT_TEMPLATE.substitute(
+            url=repr(config.url or ""),
+            headers=repr(dict(config.headers or {})),
+        )
 
     def _build_tool_methods(self, tools_info: list[dict]) -> str:
-        """根据发现的工具定义生成 Python 方法"""
+        """根据发现的工具定义生成 Python 方法
+
+        工具名不是合法标识符（含 "-"、"."、关键字等）时函数名改为转换后的名称，
+        调用服务器时仍使用原始工具名；重复的工具只生成一次。
+        """
         if not tools_info:
             return ""
 
-        methods = []
+        buf = io.StringIO()
+        raw_seen: set[str] = set()
+        func_seen: set[str] = set()
         for tool in tools_info:
             tool_name = tool["name"]
-            description = tool.get("description", "")
-            schema = tool.get("inputSchema", {})
-
-            # 从 schema 提取参数
-            properties = schema.get("properties", {})
-            required = schema.get("required", [])
-
-            # 生成参数签名
-            params = []
-            for prop_name, prop_info in properties.items():
-                param_type = prop_info.get("type", "any")
-                type_hint = {
-                    "string": "str",
-                    "integer": "int",
-                    "boolean": "bool",
-                    "number": "float",
-                    "object": "dict",
-                    "array": "list",
-                }.get(param_type, "")
-
-                if prop_name in required:
-                    params.append(
-                        f"{prop_name}: {type_hint}" if type_hint else prop_name
-                    )
-                else:
-                    default = prop_info.get("default", "None")
-                    if isinstance(default, str) and default != "None":
-                        default = f'"{default}"'
-                    params.append(
-                        f"{prop_name}: {type_hint} = {default}"
-                        if type_hint
-                        else f"{prop_name}={default}"
-                    )
-
-            params_str = ", ".join(params)
-
-            # 生成 docstring
-            docstring_parts = [description] if description else []
-            if properties:
-                docstring_parts.append("\nArgs:")
-                for prop_name, prop_info in properties.items():
-                    prop_desc = prop_info.get("description", "")
-                    docstring_parts.append(f"    {prop_name}: {prop_desc}")
-
-            docstring = "\n".join(docstring_parts)
-
-            method = f'''
-def {tool_name}({params_str}):
-    """
-    {docstring}
-    """
-    return _call_mcp("{tool_name}", {{k: v for k, v in locals().items() if v is not None}})
-'''
-            methods.append(method)
+            if tool_name in raw_seen:
+                logger.warning(f"MCP 工具重复，已忽略: {tool_name}")
+                continue
+            raw_seen.add(tool_name)
+            func_name = _python_name(tool_name, _STUB_RESERVED_NAMES, func_seen)
+
+            # 方法之间空一行
+            if buf.tell():
+                buf.write("\n")
+
+            # 定义未变化的工具直接复用上次生成的代码（refresh/refresh_all 时常见）
+            key = func_name + "\0" + json.dumps(tool, sort_keys=True, ensure_ascii=False)
+            code = self._method_cache.get(key)
+            if code is None:
+                method_buf = io.StringIO()
+                self._write_method(method_buf, tool, func_name)
+                code = self._method_cache[key] = method_buf.getvalue()
+            buf.write(code)
+        return buf.getvalue()
+
+    def _write_method(self, buf: io.StringIO, tool: dict, func_name: str) -> None:
+        """把单个工具的包装函数（签名、docstring、函数体）写入 buf"""
+        tool_name = tool["name"]
+        description = tool.get("description", "")
+        schema = tool.get("inputSchema", {})
+
+        # 从 schema 提取参数
+        properties = schema.get("properties", {})
+        required = set(schema.get("required", []))
+
+        # 一次遍历 properties，同时收集签名、docstring 参数说明和必填/可选参数；
+        # 参数名同样转换为合法标识符，发送时仍使用原始名称
+        required_params = []
+        optional_params = []
+        arg_docs = []
+        required_args = []
+        optional = []
+        param_seen: set[str] = set()
+        for prop_name, prop_info in properties.items():
+            var = _python_name(prop_name, _METHOD_RESERVED_NAMES, param_seen)
+            param_type = prop_info.get("type", "any")
+            type_hint = _JSON_TO_PY_TYPES.get(param_type, "")
+            prop_desc = _escape_docstring(prop_info.get("description", ""))
+            arg_docs.append(f"\n    {var}: {prop_desc}")
+
+            if prop_name in required:
+                required_args.append((prop_name, var))
+                required_params.append(f"{var}: {type_hint}" if type_hint else var)
+            else:
+                optional.append((prop_name, var))
+                default = prop_info.get("default", "None")
+                if isinstance(default, str) and default != "None":
+                    default = f'"{default}"'
+                optional_params.append(
+                    f"{var}: {type_hint} = {default}"
+                    if type_hint
+                    else f"{var}={default}"
+                )
 
-        return "\n".join(methods)
+        # 必填参数在前，否则 schema 中可选参数先声明时签名不合法
+        params_str = ", ".join(required_params + optional_params)
+
+        # 写入函数定义（函数名与工具名不同时注明原始名称）
+        if func_name != tool_name:
+            buf.write(f"\n# MCP 工具: {tool_name!r}")
+        buf.write(f"\ndef {func_name}({params_str}):\n")
+
+        # 写入 docstring
+        buf.write('    """\n    ')
+        if description:
+            buf.write(_escape_docstring(description))
+        if properties:
+            if description:
+                buf.write("\n")
+            buf.write("\nArgs:")
+            buf.write("".join(arg_docs))
+        buf.write('\n    """\n')
+
+        # 参数按声明显式传递：必填参数直接放入字典，
+        # 只有可选参数在生成的代码中逐个判断 None
+        arguments = ", ".join(f"{p!r}: {var}" for p, var in required_args)
+        if not optional:
+            buf.write(f"    return _invoke({tool_name!r}, {{{arguments}}})\n")
+            return
+        # 局部变量用 _args，避免与名为 arguments 的工具参数冲突
+        buf.write(f"    _args = {{{arguments}}}\n")
+        for p, var in optional:
+            buf.write(f"    if {var} is not None:\n")
+            buf.write(f"        _args[{p!r}] = {var}\n")
+        buf.write(f"    return _invoke({tool_name!r}, _args)\n")
 
     # ==================== Internal Utils ====================
 
     def _validate_transport_args(
         self,
         transport: MCPTransport,
-        *,
-        command: Optional[str],
-        url: Optional[str],
+        **params: Optional[str],
     ) -> None:
         """验证不同 transport 的参数完整性。"""
-        match transport:
-            case MCPTransport.STDIO:
-                if not command:
-                    raise ValueError("STDIO 模式需要提供 command 参数")
-            case MCPTransport.HTTP:
-                if not url:
-                    raise ValueError("HTTP 模式需要提供 url 参数")
-            case _:
-                raise ValueError(f"不支持的 MCP transport: {transport.value}")
+        required = self._REQUIRED_ARGS.get(transport)
+        if required is None:
+            raise ValueError(f"不支持的 MCP transport: {transport.value}")
+        param, message = required
+        if not params.get(param):
+            raise ValueError(message)
+
+    # ==================== Transport 分派表 ====================
+
+    # transport → 必填参数名及缺失时的错误信息
+    _REQUIRED_ARGS = {
+        MCPTransport.STDIO: ("command", "STDIO 模式需要提供 command 参数"),
+        MCPTransport.HTTP: ("url", "HTTP 模式需要提供 url 参数"),
+    }
+
+    # transport → 连接实现（分派表放在类末尾，方法均已定义）
+    _CONNECTORS = {
+        MCPTransport.STDIO: _connect_stdio,
+        MCPTransport.HTTP: _connect_http,
+    }
+
+    # transport → stub 连接代码生成方法
+    _CONNECT_CODE_BUILDERS = {
+        MCPTransport.STDIO: _build_stdio_connect_code,
+        MCPTransport.HTTP: _build_http_connect_code,
+    }
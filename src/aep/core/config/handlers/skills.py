@@ -6,16 +6,30 @@ SkillsHandler - 技能管理处理器
 
 from __future__ import annotations
 
-import shutil
+import json
+import os
 from pathlib import Path
 from typing import Optional
 
 from loguru import logger
-from aep.core.config.handlers.skills_util.parser import parse_frontmatter, read_properties
+from aep.core.config.handlers.skills_util.parser import (
+    parse_frontmatter,
+    read_frontmatter_text,
+    read_properties,
+)
 from aep.core.config.handlers.skills_util.validator import validate
 
 from ..envconfig import EnvConfig
-from .base import BaseHandler
+from .base import (
+    BaseHandler,
+    copy_tree,
+    link_or_copy,
+    remove_tree,
+    write_if_changed,
+)
+
+# generate_index 用的技能属性缓存（位于 skills/ 下；点号开头，不会被当作技能）
+_PROPS_CACHE_FILE = ".index_cache.json"
 
 
 class SkillsHandler(BaseHandler):
@@ -23,6 +37,14 @@ class SkillsHandler(BaseHandler):
 
     def __init__(self, config: EnvConfig):
         self.config = config
+        # 路径在初始化时取一次，各方法直接复用
+        self._skills_dir = config.skills_dir
+        self._index_path = config.skills_dir / "index.md"
+        self._props_cache_path = config.skills_dir / _PROPS_CACHE_FILE
+        # 技能名 → [SKILL.md 的 inode, mtime_ns, size, name, description]，首次使用时从磁盘加载
+        self._props_cache: Optional[dict[str, list]] = None
+        # list() 结果缓存：(skills/ 的 mtime_ns, 技能名称)
+        self._list_cache: Optional[tuple[int, tuple[str, ...]]] = None
 
     def _validate_skill(self, skill_dir: Path) -> None:
         """使用本地 skills-ref 验证器校验技能目录。"""
@@ -38,8 +60,8 @@ class SkillsHandler(BaseHandler):
         if source.suffix.lower() != ".md":
             raise ValueError("单文件技能仅支持 .md（SKILL.md）输入")
 
-        content = source.read_text(encoding="utf-8")
-        metadata, _ = parse_frontmatter(content)
+        # 只读到 frontmatter 结束处，正文较大时不必整篇读入
+        metadata, _ = parse_frontmatter(read_frontmatter_text(source))
         skill_name = metadata.get("name")
         if not isinstance(skill_name, str) or not skill_name.strip():
             raise ValueError("单文件 SKILL.md 缺少有效的 name 字段")
@@ -75,21 +97,19 @@ class SkillsHandler(BaseHandler):
                 )
             name = parsed_name
             skill_dir = self.config.skill_dir(name)
-            if skill_dir.exists():
-                shutil.rmtree(skill_dir)
+            remove_tree(skill_dir)
             skill_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(source, skill_dir / "SKILL.md")
+            link_or_copy(source, skill_dir / "SKILL.md")
             logger.warning(
                 f"检测到单文件技能，已按 name={name} 写入 skills/{name}/SKILL.md"
             )
         elif source.is_dir():
-            # 目录技能，整体复制
+            # 目录技能，整体复制（文件优先 reflink，文件多时并发放置）
             if name is None:
                 name = source.name
             skill_dir = self.config.skill_dir(name)
-            if skill_dir.exists():
-                shutil.rmtree(skill_dir)
-            shutil.copytree(source, skill_dir)
+            remove_tree(skill_dir)
+            copy_tree(source, skill_dir)
         else:
             raise FileNotFoundError(f"技能源不存在: {source}")
 
@@ -97,11 +117,13 @@ class SkillsHandler(BaseHandler):
             self._validate_skill(skill_dir)
         except Exception:
             # 避免保留不合法技能目录
-            if skill_dir.exists():
-                shutil.rmtree(skill_dir)
+            remove_tree(skill_dir)
             raise
 
         logger.info(f"添加技能: {name} <- {source}")
+        self._invalidate_props(name)
+
+        venv_dir = self.config.skill_venv_dir(name)
 
         # 保存依赖到 requirements.txt
         if dependencies:
@@ -111,12 +133,12 @@ class SkillsHandler(BaseHandler):
             )
 
         # 确保 venv 存在
-        self.ensure_venv(self.config.skill_venv_dir(name))
+        self.ensure_venv(venv_dir)
 
         # 安装依赖
         if dependencies:
             self.install_dependencies(
-                self.config.skill_venv_dir(name),
+                venv_dir,
                 dependencies,
                 skill_dir,
             )
@@ -134,22 +156,33 @@ class SkillsHandler(BaseHandler):
         if not skill_dir.exists():
             raise FileNotFoundError(f"技能不存在: {name}")
 
+        venv_dir = self.config.skill_venv_dir(name)
+
         # 确保 venv 存在
-        self.ensure_venv(self.config.skill_venv_dir(name))
+        self.ensure_venv(venv_dir)
 
         # 从 requirements.txt 安装
         self.install_from_requirements(
-            self.config.skill_venv_dir(name),
+            venv_dir,
             self.config.skill_requirements(name),
         )
 
     def list(self) -> list[str]:
-        """列出所有技能名称"""
-        return [
-            d.name
-            for d in self.config.skills_dir.iterdir()
-            if d.is_dir() and not d.name.startswith(".")
-        ]
+        """列出所有技能名称
+
+        以 skills/ 目录的 mtime_ns 为校验，条目未增删时直接返回上次的扫描结果。
+        """
+        mtime = os.stat(self._skills_dir).st_mtime_ns
+        if self._list_cache is not None and self._list_cache[0] == mtime:
+            return list(self._list_cache[1])
+
+        # scandir 的 DirEntry 自带类型信息，普通目录无需额外 stat
+        with os.scandir(self._skills_dir) as it:
+            names = [
+                e.name for e in it if not e.name.startswith(".") and e.is_dir()
+            ]
+        self._list_cache = (mtime, tuple(names))
+        return names
 
     def remove(self, name: str) -> bool:
         """
@@ -162,34 +195,96 @@ class SkillsHandler(BaseHandler):
             是否删除成功
         """
         skill_dir = self.config.skill_dir(name)
-        if skill_dir.exists():
-            shutil.rmtree(skill_dir)
+        self._invalidate_props(name)
+        if remove_tree(skill_dir):
             logger.info(f"删除技能: {name}")
             return True
         return False
 
     def generate_index(self) -> None:
-        """生成技能索引 index.md"""
+        """生成技能索引 index.md
+
+        各技能的 name/description 按 SKILL.md 的 (inode, mtime_ns, size) 缓存在
+        skills/.index_cache.json 中，未变化的技能只 stat 不重新解析 frontmatter。
+        """
         skills = self.list()
+        skills.sort()
 
-        content = "# Skills\n\n"
+        cache = self._load_props_cache()
+        fresh: dict[str, list] = {}
+        parts = ["# Skills\n\n"]
         if skills:
-            content += "可用技能列表（name / description / path）：\n\n"
-            for skill in sorted(skills):
+            parts.append("可用技能列表（name / description / path）：\n\n")
+            for skill in skills:
                 skill_dir = self.config.skill_dir(skill)
                 try:
-                    props = read_properties(skill_dir)
-                    description = " ".join(props.description.split())
-                    content += (
-                        f"- `{props.name}`: {description} "
+                    name, description = self._skill_summary(
+                        skill, skill_dir, cache.get(skill), fresh
+                    )
+                    parts.append(
+                        f"- `{name}`: {description} "
                         f"(path: `{skill_dir.name}/`)\n"
                     )
                 except Exception as exc:
                     logger.warning(f"技能索引解析失败 {skill_dir}: {exc}")
-                    content += f"- `{skill}`: (path: `{skill_dir.name}/`)\n"
+                    parts.append(f"- `{skill}`: (path: `{skill_dir.name}/`)\n")
 
-            content += "\n运行 Python 脚本请使用：`skills run xx.py`\n"
+            parts.append("\n运行 Python 脚本请使用：`skills run xx.py`\n")
         else:
-            content += "_暂无技能_\n"
+            parts.append("_暂无技能_\n")
+
+        content = "".join(parts)
+        write_if_changed(self._index_path, content.encode("utf-8"))
 
-        (self.config.skills_dir / "index.md").write_text(content, encoding="utf-8")
+        # 只保留现存技能的条目，内容不变时不重写
+        self._props_cache = fresh
+        self._save_props_cache()
+
+    def _skill_summary(
+        self,
+        skill: str,
+        skill_dir: Path,
+        cached: Optional[list],
+        fresh: dict[str, list],
+    ) -> tuple[str, str]:
+        """取技能的 (name, description)：SKILL.md 未变化时用缓存，否则重新解析并记入 fresh"""
+        st = None
+        for md_name in ("SKILL.md", "skill.md"):
+            try:
+                st = os.stat(skill_dir / md_name)
+                break
+            except FileNotFoundError:
+                continue
+
+        key = [st.st_ino, st.st_mtime_ns, st.st_size] if st is not None else None
+        if key is not None and cached is not None and cached[:3] == key:
+            fresh[skill] = cached
+            return cached[3], cached[4]
+
+        props = read_properties(skill_dir)
+        description = " ".join(props.description.split())
+        if key is not None:
+            fresh[skill] = key + [props.name, description]
+        return props.name, description
+
+    def _load_props_cache(self) -> dict[str, list]:
+        """加载技能属性缓存，文件缺失或损坏时视为空"""
+        if self._props_cache is None:
+            try:
+                data = json.loads(self._props_cache_path.read_bytes())
+            except (FileNotFoundError, ValueError):
+                data = {}
+            self._props_cache = data if isinstance(data, dict) else {}
+        return self._props_cache
+
+    def _invalidate_props(self, name: str) -> None:
+        """技能被添加/删除时丢弃其缓存条目（连同 list() 缓存）"""
+        self._list_cache = None
+        cache = self._load_props_cache()
+        if cache.pop(name, None) is not None:
+            self._save_props_cache()
+
+    def _save_props_cache(self) -> None:
+        """原子写入技能属性缓存，内容不变时不重写"""
+        data = json.dumps(self._props_cache, ensure_ascii=False, sort_keys=True)
+        write_if_changed(self._props_cache_path, data.encode("utf-8"))
@@ -2,7 +2,12 @@
 
 from .errors import ParseError, SkillError, ValidationError
 from .models import SkillProperties
-from .parser import find_skill_md, parse_frontmatter, read_properties
+from .parser import (
+    find_skill_md,
+    parse_frontmatter,
+    read_frontmatter_text,
+    read_properties,
+)
 from .validator import validate, validate_metadata
 
 __all__ = [
@@ -12,6 +17,7 @@ __all__ = [
     "SkillProperties",
     "find_skill_md",
     "parse_frontmatter",
+    "read_frontmatter_text",
     "read_properties",
     "validate",
     "validate_metadata",
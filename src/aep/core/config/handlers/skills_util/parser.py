@@ -3,11 +3,11 @@
 from pathlib import Path
 from typing import Optional
 
-import strictyaml
-
 from .errors import ParseError, ValidationError
 from .models import SkillProperties
 
+_FRONTMATTER_CHUNK = 4096
+
 
 def find_skill_md(skill_dir: Path) -> Optional[Path]:
     """Find the SKILL.md file in a skill directory."""
@@ -18,8 +18,40 @@ def find_skill_md(skill_dir: Path) -> Optional[Path]:
     return None
 
 
+def read_frontmatter_text(path: Path) -> str:
+    """Read SKILL.md only up to the closing frontmatter fence.
+
+    The result parses the same as the full file with ``parse_frontmatter``
+    (only the body is cut short). Without a closing fence the whole file
+    is read, so parse errors are unchanged.
+    """
+    buf = bytearray()
+    with open(path, "rb") as f:
+        while chunk := f.read(_FRONTMATTER_CHUNK):
+            # Look for the closing "---" in the new data, allowing it to
+            # straddle the previous chunk boundary.
+            start = max(3, len(buf) - 2)
+            buf += chunk
+            if len(buf) >= 3 and not buf.startswith(b"---"):
+                break
+            end = buf.find(b"---", start)
+            if end != -1:
+                del buf[end + 3 :]
+                break
+
+    text = buf.decode("utf-8")
+    if "\r" in text:
+        # Match read_text()'s universal newline handling
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
 def parse_frontmatter(content: str) -> tuple[dict, str]:
     """Parse YAML frontmatter from SKILL.md content."""
+    # Imported on first parse: strictyaml (and its ruamel copy) dominates
+    # this package's import time, and cached index runs never parse.
+    import strictyaml
+
     if not content.startswith("---"):
         raise ParseError("SKILL.md must start with YAML frontmatter (---)")
 
@@ -53,8 +85,7 @@ def read_properties(skill_dir: Path) -> SkillProperties:
     if skill_md is None:
         raise ParseError(f"SKILL.md not found in {skill_dir}")
 
-    content = skill_md.read_text(encoding="utf-8")
-    metadata, _ = parse_frontmatter(content)
+    metadata, _ = parse_frontmatter(read_frontmatter_text(skill_md))
 
     if "name" not in metadata:
         raise ValidationError("Missing required field in frontmatter: name")
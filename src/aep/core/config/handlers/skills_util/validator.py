@@ -1,5 +1,6 @@
 """Skill validation logic."""
 
+import re
 import unicodedata
 from pathlib import Path
 from typing import Optional
@@ -11,6 +12,10 @@ MAX_SKILL_NAME_LENGTH = 64
 MAX_DESCRIPTION_LENGTH = 1024
 MAX_COMPATIBILITY_LENGTH = 500
 
+# Common case: lowercase ASCII words joined by single hyphens.
+# Names matching this pass every character check below at once.
+_NAME_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
 ALLOWED_FIELDS = {
     "name",
     "description",
@@ -21,6 +26,11 @@ ALLOWED_FIELDS = {
 }
 
 
+def _nfkc(text: str) -> str:
+    # NFKC leaves pure-ASCII text unchanged; str.isascii() is a flag check.
+    return text if text.isascii() else unicodedata.normalize("NFKC", text)
+
+
 def _validate_name(name: str, skill_dir: Optional[Path]) -> list[str]:
     errors = []
 
@@ -28,7 +38,11 @@ def _validate_name(name: str, skill_dir: Optional[Path]) -> list[str]:
         errors.append("Field 'name' must be a non-empty string")
         return errors
 
-    name = unicodedata.normalize("NFKC", name.strip())
+    name = _nfkc(name.strip())
+
+    if len(name) <= MAX_SKILL_NAME_LENGTH and _NAME_RE.fullmatch(name):
+        # Fast path; non-ASCII letters still go through the detailed checks.
+        return _validate_dir_name(name, skill_dir)
 
     if len(name) > MAX_SKILL_NAME_LENGTH:
         errors.append(
@@ -51,16 +65,20 @@ def _validate_name(name: str, skill_dir: Optional[Path]) -> list[str]:
             "Only letters, digits, and hyphens are allowed."
         )
 
-    if skill_dir is not None:
-        dir_name = unicodedata.normalize("NFKC", skill_dir.name)
-        if dir_name != name:
-            errors.append(
-                f"Directory name '{skill_dir.name}' must match skill name '{name}'"
-            )
-
+    errors.extend(_validate_dir_name(name, skill_dir))
     return errors
 
 
+def _validate_dir_name(name: str, skill_dir: Optional[Path]) -> list[str]:
+    if skill_dir is None:
+        return []
+
+    dir_name = _nfkc(skill_dir.name)
+    if dir_name != name:
+        return [f"Directory name '{skill_dir.name}' must match skill name '{name}'"]
+    return []
+
+
 def _validate_description(description: str) -> list[str]:
     errors = []
 
@@ -6,14 +6,32 @@ ToolsHandler - 工具管理处理器
 
 from __future__ import annotations
 
-import shutil
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 
 from loguru import logger
 
 from ..envconfig import EnvConfig
-from .base import BaseHandler
+from .base import BaseHandler, file_lock, link_or_copy, write_if_changed
+
+# 共享 venv 缓存目录的环境变量，未设置时不启用缓存
+VENV_CACHE_ENV = "AEP_VENV_CACHE"
+# 缓存 venv 安装完成的标记文件
+_VENV_READY_MARKER = ".aep-ready"
+
+
+def _requirements_digest(requirements: Path) -> str:
+    """依赖集合的哈希：忽略顺序、首尾空白、空行和注释，相同依赖得到同一缓存"""
+    try:
+        lines = requirements.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        lines = []
+    stripped = (line.strip() for line in lines)
+    entries = sorted({line for line in stripped if line and not line.startswith("#")})
+    return hashlib.sha256("\n".join(entries).encode("utf-8")).hexdigest()[:16]
 
 
 class ToolsHandler(BaseHandler):
@@ -21,6 +39,13 @@ class ToolsHandler(BaseHandler):
 
     def __init__(self, config: EnvConfig):
         self.config = config
+        # 路径在初始化时取一次，各方法直接复用
+        self._tools_dir = config.tools_dir
+        self._tools_venv_dir = config.tools_venv_dir
+        self._tools_requirements = config.tools_requirements
+        self._index_path = config.tools_dir / "index.md"
+        # list() 结果缓存：(tools/ 的 mtime_ns, 工具名称)
+        self._list_cache: Optional[tuple[int, tuple[str, ...]]] = None
 
     def add(
         self,
@@ -57,25 +82,87 @@ class ToolsHandler(BaseHandler):
 
         # 1. 复制工具文件
         target = self.config.tool_path(name)
-        shutil.copy2(source, target)
+        link_or_copy(source, target)
+        self._list_cache = None
         logger.info(f"添加工具: {name} <- {source}")
 
         # 2. 保存依赖到 requirements.txt
         if dependencies:
-            self.save_requirements(self.config.tools_requirements, dependencies)
+            self.save_requirements(self._tools_requirements, dependencies)
+
+        # 3/4. 确保 venv 存在并安装依赖（启用缓存时直接链接共享 venv）
+        if not self._link_cached_venv():
+            self.ensure_venv(self._tools_venv_dir)
+            if dependencies:
+                self.install_dependencies(
+                    self._tools_venv_dir,
+                    dependencies,
+                    self._tools_dir,
+                )
+
+        return target
 
-        # 3. 确保 venv 存在
-        self.ensure_venv(self.config.tools_venv_dir)
+    def add_many(
+        self,
+        specs: Iterable[tuple[str | Path, Optional[str], Optional[list[str]]]],
+    ) -> list[Path]:
+        """
+        批量添加工具
+
+        与逐个调用 add() 相比，所有依赖合并后只写一次 requirements.txt、
+        只调用一次 uv pip install，由 uv 统一解析依赖关系。
+
+        Args:
+            specs: (source, name, dependencies) 元组列表，含义同 add()
 
-        # 4. 安装依赖
+        Returns:
+            各工具在配置目录中的路径，顺序与 specs 一致
+
+        Raises:
+            FileNotFoundError: 任一源文件不存在（不复制任何工具）
+            ValueError: 多个 spec 对应同一工具名称（不复制任何工具）
+        """
+        entries: list[tuple[Path, Path]] = []
+        dependencies: list[str] = []
+        targets: dict[Path, Path] = {}
+        for source, name, deps in specs:
+            source = Path(source).resolve()
+            if not source.exists():
+                raise FileNotFoundError(f"工具文件不存在: {source}")
+            target = self.config.tool_path(name or source.stem)
+            # 同一目标被并发放置会相互覆盖
+            if target in targets:
+                raise ValueError(
+                    f"工具名称重复: {target.stem} ({targets[target]} 与 {source})"
+                )
+            targets[target] = source
+            entries.append((source, target))
+            if deps:
+                dependencies.extend(deps)
+
+        # 1. 复制工具文件
+        with ThreadPoolExecutor() as pool:
+            list(pool.map(lambda entry: link_or_copy(*entry), entries))
+        self._list_cache = None
+        for source, target in entries:
+            logger.info(f"添加工具: {target.stem} <- {source}")
+
+        # 2. 合并去重后保存依赖
+        dependencies = list(dict.fromkeys(dependencies))
         if dependencies:
-            self.install_dependencies(
-                self.config.tools_venv_dir,
-                dependencies,
-                self.config.tools_dir,
-            )
+            self.save_requirements(self._tools_requirements, dependencies)
 
-        return target
+        # 3/4. 确保 venv 存在并一次性安装全部依赖
+        if not self._link_cached_venv():
+            self.ensure_venv(self._tools_venv_dir)
+            if dependencies:
+                self.install_dependencies(
+                    self._tools_venv_dir,
+                    dependencies,
+                    self._tools_dir,
+                )
+
+        return [target for _, target in entries]
 
     def add_dependencies(self, *packages: str) -> Path:
         """
@@ -90,41 +177,103 @@ class ToolsHandler(BaseHandler):
         dependencies = list(packages)
 
         # 1. 保存依赖
-        self.save_requirements(self.config.tools_requirements, dependencies)
-
-        # 2. 确保 venv 存在
-        self.ensure_venv(self.config.tools_venv_dir)
+        self.save_requirements(self._tools_requirements, dependencies)
 
-        # 3. 安装依赖
-        self.install_dependencies(
-            self.config.tools_venv_dir,
-            dependencies,
-            self.config.tools_dir,
-        )
+        # 2/3. 确保 venv 存在并安装依赖（启用缓存时直接链接共享 venv）
+        if not self._link_cached_venv():
+            self.ensure_venv(self._tools_venv_dir)
+            self.install_dependencies(
+                self._tools_venv_dir,
+                dependencies,
+                self._tools_dir,
+            )
 
         logger.info(f"添加 tools 依赖: {packages}")
-        return self.config.tools_requirements
+        return self._tools_requirements
 
     def sync_dependencies(self) -> None:
         """
         同步依赖：确保 venv 存在并安装 requirements.txt 中的所有依赖
         """
+        if self._link_cached_venv():
+            return
+
         # 1. 确保 venv 存在
-        self.ensure_venv(self.config.tools_venv_dir)
+        self.ensure_venv(self._tools_venv_dir)
 
         # 2. 从 requirements.txt 安装
         self.install_from_requirements(
-            self.config.tools_venv_dir,
-            self.config.tools_requirements,
+            self._tools_venv_dir,
+            self._tools_requirements,
         )
 
+    def _link_cached_venv(self) -> bool:
+        """
+        按 requirements.txt 内容把 tools/.venv 链接到共享 venv 缓存
+
+        仅在设置了 AEP_VENV_CACHE 时启用。缓存目录为
+        $AEP_VENV_CACHE/<依赖集合的 sha256 前 16 位>，首次使用时
+        创建并安装依赖，之后相同依赖的配置目录直接建立符号链接。
+        依赖变化会得到新的哈希并重新链接，不会修改已有缓存。
+        tools/.venv 已是真实目录时不做处理。
+
+        构建在 <哈希>.lock 文件锁内进行，多个进程同时需要同一依赖集合时
+        只有一个构建，其余等待后直接复用；venv 内的脚本记录了绝对路径，
+        因此在原位构建而不是先建在临时目录再改名。
+
+        注意：每个新的依赖集合都会从零构建完整 venv（不基于已有缓存增量安装），
+        启用缓存时 add()/add_dependencies() 也不再对 tools/.venv 做增量
+        uv pip install，而是按完整的 requirements.txt 切换到对应缓存。
+
+        Returns:
+            是否已通过缓存准备好 tools/.venv
+        """
+        cache_root = os.environ.get(VENV_CACHE_ENV)
+        venv_dir = self._tools_venv_dir
+        if not cache_root or (venv_dir.exists() and not venv_dir.is_symlink()):
+            return False
+
+        requirements = self._tools_requirements
+        digest = _requirements_digest(requirements)
+        # 解析为绝对路径：符号链接目标为相对路径时会相对 tools/ 解析而失效
+        cached = Path(cache_root).expanduser().resolve() / digest
+
+        if not (cached / _VENV_READY_MARKER).exists():
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(cached.with_name(f"{digest}.lock")):
+                # 等锁期间可能已被其他进程构建完成
+                if not (cached / _VENV_READY_MARKER).exists():
+                    logger.info(f"构建共享 venv 缓存: {cached}")
+                    self.ensure_venv(cached)
+                    self.install_from_requirements(cached, requirements)
+                    (cached / _VENV_READY_MARKER).touch()
+
+        if venv_dir.is_symlink():
+            if venv_dir.resolve() == cached.resolve():
+                return True
+            venv_dir.unlink()
+        venv_dir.symlink_to(cached, target_is_directory=True)
+        logger.info(f"复用共享 venv: {venv_dir} -> {cached}")
+        return True
+
     def list(self) -> list[str]:
-        """列出所有工具名称"""
-        return [
-            f.stem
-            for f in self.config.tools_dir.glob("*.py")
-            if not f.stem.startswith("_")
-        ]
+        """列出所有工具名称
+
+        以 tools/ 目录的 mtime_ns 为校验，条目未增删时直接返回上次的扫描结果。
+        """
+        mtime = os.stat(self._tools_dir).st_mtime_ns
+        if self._list_cache is not None and self._list_cache[0] == mtime:
+            return list(self._list_cache[1])
+
+        # 只按文件名过滤，scandir 一次遍历即可，不需要逐项 stat
+        with os.scandir(self._tools_dir) as it:
+            names = [
+                e.name[:-3]
+                for e in it
+                if e.name.endswith(".py") and not e.name.startswith("_")
+            ]
+        self._list_cache = (mtime, tuple(names))
+        return names
 
     def remove(self, name: str) -> bool:
         """
@@ -139,6 +288,7 @@ class ToolsHandler(BaseHandler):
         tool_path = self.config.tool_path(name)
         if tool_path.exists():
             tool_path.unlink()
+            self._list_cache = None
             logger.info(f"删除工具: {name}")
             return True
         return False
@@ -146,23 +296,27 @@ class ToolsHandler(BaseHandler):
     def generate_index(self) -> None:
         """生成工具索引 index.md"""
         tools = self.list()
+        tools.sort()
 
-        content = "# Tools\n\n"
+        parts = ["# Tools\n\n"]
         if tools:
-            content += "可用工具列表：\n\n"
-            for tool in sorted(tools):
+            parts.append("可用工具列表：\n\n")
+            for tool in tools:
                 # 检查是否是 MCP 工具（配置在 config_dir/_mcp/ 下）
                 mcp_config_dir = self.config.mcp_config_path(tool)
                 if (
                     mcp_config_dir.is_dir()
                     and (mcp_config_dir / "config.json").exists()
                 ):
-                    content += f'- `{tool}` (MCP): 使用 `tools run "tools.{tool}.<func>(...)"`\n'
+                    parts.append(
+                        f'- `{tool}` (MCP): 使用 `tools run "tools.{tool}.<func>(...)"`\n'
+                    )
                 else:
-                    content += (
+                    parts.append(
                         f'- `{tool}`: 使用 `tools run "tools.{tool}.<func>(...)"`\n'
                     )
         else:
-            content += "_暂无工具_\n"
+            parts.append("_暂无工具_\n")
 
-        (self.config.tools_dir / "index.md").write_text(content, encoding="utf-8")
+        content = "".join(parts)
+        write_if_changed(self._index_path, content.encode("utf-8"))
@@ -9,7 +9,8 @@ SkillExecutor: 在技能专属的虚拟环境中执行脚本
 注意: MCP 服务器通过 config.add_mcp_server() 自动转换为 tool stub
 """
 
-import shutil
+import functools
+import json
 import subprocess
 from dataclasses import dataclass
 from pathlib import Path
@@ -17,6 +18,8 @@ from typing import TYPE_CHECKING, Optional
 
 from loguru import logger
 
+from aep.core.config.handlers.base import _which_uv
+
 if TYPE_CHECKING:
     from aep.core.config import EnvManager
 
@@ -30,14 +33,11 @@ class ExecResult:
     return_code: int = 0
 
 
-def _find_uv() -> str:
-    """查找 uv 可执行文件"""
-    # 尝试直接调用
-    if shutil.which("uv"):
-        return "uv"
-    # Windows: 可能在 Python Scripts 目录
-    # 如果找不到，返回 uv 让系统报错
-    return "uv"
+def _truncate(text: Optional[str], limit: int = 200) -> str:
+    """截断日志中的长文本，超出 limit 时以 ... 结尾"""
+    if not text:
+        return ""
+    return text if len(text) <= limit else f"{text[:limit]}..."
 
 
 def _get_python(venv_dir: Path) -> Path:
@@ -53,6 +53,148 @@ def _get_python(venv_dir: Path) -> Path:
     raise RuntimeError(f"未找到 venv Python: {venv_dir}")
 
 
+# 包装脚本的公共部分：tools 命名空间加载与 REPL 风格执行，run / run_many 共用
+_WRAPPER_PRELUDE = r"""
+import ast
+import importlib.util
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+
+class ToolsNamespace:
+    pass
+
+
+# 动态加载 tools 命名空间，加载失败的工具输出警告到 stderr
+def _load_tools(tools_dir):
+    tools = ToolsNamespace()
+    for py_file in tools_dir.glob("*.py"):
+        tool_name = py_file.stem
+        try:
+            spec = importlib.util.spec_from_file_location(tool_name, py_file)
+            if spec and spec.loader:
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                setattr(tools, tool_name, module)
+        except Exception as e:
+            print(f"Warning: Failed to load tool {tool_name}: {e}", file=sys.stderr)
+    return tools
+
+
+# REPL 风格执行代码：最后一条语句是表达式时自动打印其值
+def _repl_exec(_code, _globals):
+    tree = ast.parse(_code)
+    if not tree.body:
+        return
+    last_stmt = tree.body[-1]
+    if isinstance(last_stmt, ast.Expr):
+        # 前面的语句整体 exec，最后一个表达式单独 eval 并打印结果
+        if len(tree.body) > 1:
+            mod = ast.Module(body=tree.body[:-1], type_ignores=[])
+            exec(compile(mod, "<code>", "exec"), _globals)
+        expr = ast.Expression(body=last_stmt.value)
+        result = eval(compile(expr, "<code>", "eval"), _globals)
+        if result is not None:
+            print(result)
+    else:
+        exec(compile(tree, "<code>", "exec"), _globals)
+"""
+
+# 单段执行：用户代码在脚本自身的全局命名空间中执行
+_RUN_MAIN = r"""
+tools = _load_tools(tools_dir)
+
+try:
+    _repl_exec(_code, globals())
+except Exception as e:
+    print(f"{type(e).__name__}: {e}", file=sys.stderr)
+    sys.exit(1)
+"""
+
+
+@functools.lru_cache(maxsize=256)
+def _render_wrapper_script(
+    code: str, tools_dir: str, cwd: str, workspace: str
+) -> str:
+    """
+    渲染 tools run 的包装脚本
+
+    用户代码在 venv 子进程中编译执行，父进程无法复用 code 对象；
+    这里缓存渲染好的脚本，重复执行相同代码时跳过转义与拼接。
+    上下文变量与代码以 repr 字面量注入，无需手工转义。
+    """
+    context = (
+        f"\n# 上下文变量\n"
+        f"cwd = Path({cwd!r}) if {cwd!r} else Path.cwd()\n"
+        f"workspace = Path({workspace!r}) if {workspace!r} else cwd\n"
+        f"tools_dir = Path({tools_dir!r})\n"
+        f"_code = {code!r}\n"
+    )
+    return _WRAPPER_PRELUDE + context + _RUN_MAIN
+
+
+# 批量执行结果与前置输出之间的分隔标记
+_BATCH_SENTINEL = "\n<<<AEP-BATCH-RESULTS>>>\n"
+
+# 批量执行脚本：一个子进程内加载一次 tools，依次执行多段代码
+# 参数: argv[1]=tools_dir, argv[2]=cwd, argv[3]=workspace；代码列表以 JSON 从 stdin 传入
+_BATCH_WRAPPER_SCRIPT = _WRAPPER_PRELUDE + r"""
+import contextlib
+import io
+
+tools_dir = Path(sys.argv[1])
+cwd = Path(sys.argv[2]) if sys.argv[2] else Path.cwd()
+workspace = Path(sys.argv[3]) if sys.argv[3] else cwd
+_codes = json.loads(sys.stdin.read())
+
+# 加载警告附加到每段代码的 stderr，与逐段 run() 的输出一致
+_load_stderr = io.StringIO()
+with contextlib.redirect_stderr(_load_stderr):
+    tools = _load_tools(tools_dir)
+_load_warnings = _load_stderr.getvalue()
+
+_base_globals = {
+    "__name__": "__main__",
+    "__builtins__": __builtins__,
+    "sys": sys,
+    "os": os,
+    "json": json,
+    "re": re,
+    "Path": Path,
+    "cwd": cwd,
+    "workspace": workspace,
+    "tools_dir": tools_dir,
+    "tools": tools,
+}
+
+_results = []
+for _code in _codes:
+    _out, _err = io.StringIO(), io.StringIO()
+    _err.write(_load_warnings)
+    _rc = 0
+    with contextlib.redirect_stdout(_out), contextlib.redirect_stderr(_err):
+        try:
+            _repl_exec(_code, dict(_base_globals))
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                _rc = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                _rc = 1
+        except Exception as e:
+            print(f"{type(e).__name__}: {e}", file=sys.stderr)
+            _rc = 1
+    _results.append(
+        {"stdout": _out.getvalue(), "stderr": _err.getvalue(), "return_code": _rc}
+    )
+
+sys.__stdout__.write(SENTINEL + json.dumps(_results))
+""".replace("SENTINEL", repr(_BATCH_SENTINEL))
+
+
 class ToolExecutor:
     """
     工具执行器
@@ -72,7 +214,7 @@ class ToolExecutor:
         self.config = config
         self.tools_dir = config.tools_dir
         self.venv_dir = self.tools_dir / ".venv"
-        self._uv = _find_uv()
+        self._uv = _which_uv()
 
     def ensure_venv(self) -> Path:
         """确保虚拟环境存在，返回 Python 路径"""
@@ -109,7 +251,7 @@ class ToolExecutor:
             ExecResult
         """
         logger.info(f"ToolExecutor.run: cwd={cwd}, workspace={workspace}")
-        logger.debug(f"执行代码:\n{code[:200]}{'...' if len(code) > 200 else ''}")
+        logger.debug(f"执行代码:\n{_truncate(code)}")
 
         python = self.ensure_venv()
 
@@ -127,7 +269,7 @@ class ToolExecutor:
             logger.debug(f"执行完成: return_code={result.returncode}")
             if result.returncode != 0:
                 logger.warning(
-                    f"执行返回非零: stderr={result.stderr[:200] if result.stderr else ''}"
+                    f"执行返回非零: stderr={_truncate(result.stderr)}"
                 )
             return ExecResult(
                 stdout=result.stdout,
@@ -141,94 +283,103 @@ class ToolExecutor:
             logger.exception(f"工具执行异常: {e}")
             return ExecResult(stderr=f"执行错误: {e}", return_code=1)
 
-    def _build_wrapper_script(
+    def run_many(
         self,
-        code: str,
-        cwd: Optional[Path],
-        workspace: Optional[Path],
-    ) -> str:
-        """构建包装脚本，注入上下文"""
-        tools_dir_str = str(self.tools_dir).replace("\\", "\\\\")
-        cwd_str = str(cwd).replace("\\", "\\\\") if cwd else ""
-        workspace_str = str(workspace).replace("\\", "\\\\") if workspace else ""
+        codes: list[str],
+        cwd: Optional[Path] = None,
+        workspace: Optional[Path] = None,
+    ) -> list[ExecResult]:
+        """
+        在同一个 venv 子进程中依次执行多段 Python 代码
 
-        # 转义用户代码中的特殊字符
-        escaped_code = code.replace("\\", "\\\\").replace('"', '\\"')
+        与逐段调用 run() 语义一致（每段代码使用独立的全局命名空间，
+        REPL 风格打印最后一个表达式），但只启动一次解释器、只加载一次
+        tools 命名空间。与逐段 run() 的差异：
 
-        wrapper = f'''
-import sys
-import os
-import json
-import re
-import ast
-import importlib.util
-from pathlib import Path
+        - 工具模块只导入一次，其模块级状态（缓存、计数器等）在同一批次内共享，
+          前一段代码对工具模块的修改对后续代码可见
+        - 整批共用一个 60 秒 × 段数 的总超时（而非每段 60 秒），
+          超时后整批结果都标记为超时（return_code=124）
 
-# 上下文变量
-cwd = Path("{cwd_str}") if "{cwd_str}" else Path.cwd()
-workspace = Path("{workspace_str}") if "{workspace_str}" else cwd
-tools_dir = Path("{tools_dir_str}")
+        Args:
+            codes: Python 代码字符串列表
+            cwd: 当前工作目录
+            workspace: 工作区根目录
 
-# 动态加载 tools 命名空间
-class ToolsNamespace:
-    pass
+        Returns:
+            与 codes 一一对应的 ExecResult 列表
+        """
+        if not codes:
+            return []
 
-tools = ToolsNamespace()
-for py_file in tools_dir.glob("*.py"):
-    tool_name = py_file.stem
-    try:
-        spec = importlib.util.spec_from_file_location(tool_name, py_file)
-        if spec and spec.loader:
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            setattr(tools, tool_name, module)
-    except Exception as e:
-        print(f"Warning: Failed to load tool {{tool_name}}: {{e}}", file=sys.stderr)
-
-# REPL 风格执行：自动打印最后一个表达式的值
-_code = """{escaped_code}"""
+        logger.info(
+            f"ToolExecutor.run_many: {len(codes)} 段代码, cwd={cwd}, workspace={workspace}"
+        )
 
-def _repl_exec(_code, _globals):
-    """
-    REPL 风格执行代码
-    
-    如果最后一条语句是表达式，自动打印其值
-    """
-    try:
-        tree = ast.parse(_code)
-    except SyntaxError as e:
-        print(f"SyntaxError: {{e}}", file=sys.stderr)
-        sys.exit(1)
-    
-    if not tree.body:
-        return
-    
-    # 检查最后一条语句是否是表达式
-    last_stmt = tree.body[-1]
-    
-    if isinstance(last_stmt, ast.Expr):
-        # 最后是表达式，分离出来单独 eval
-        # 编译并执行前面的语句
-        if len(tree.body) > 1:
-            mod = ast.Module(body=tree.body[:-1], type_ignores=[])
-            exec(compile(mod, "<code>", "exec"), _globals)
-        
-        # eval 最后一个表达式并打印结果
-        expr = ast.Expression(body=last_stmt.value)
-        result = eval(compile(expr, "<code>", "eval"), _globals)
-        if result is not None:
-            print(result)
-    else:
-        # 最后不是表达式，整体 exec
-        exec(compile(tree, "<code>", "exec"), _globals)
+        python = self.ensure_venv()
+        timeout = 60 * len(codes)
 
-try:
-    _repl_exec(_code, globals())
-except Exception as e:
-    print(f"{{type(e).__name__}}: {{e}}", file=sys.stderr)
-    sys.exit(1)
-'''
-        return wrapper
+        try:
+            result = subprocess.run(
+                [
+                    str(python),
+                    "-c",
+                    _BATCH_WRAPPER_SCRIPT,
+                    str(self.tools_dir),
+                    str(cwd) if cwd else "",
+                    str(workspace) if workspace else "",
+                ],
+                input=json.dumps(codes),
+                cwd=str(cwd) if cwd else None,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            logger.error(f"批量工具执行超时 ({timeout}s)")
+            return [
+                ExecResult(stderr=f"执行超时 ({timeout}s)", return_code=124)
+                for _ in codes
+            ]
+        except Exception as e:
+            logger.exception(f"批量工具执行异常: {e}")
+            return [
+                ExecResult(stderr=f"执行错误: {e}", return_code=1) for _ in codes
+            ]
+
+        leaked, sep, payload = result.stdout.rpartition(_BATCH_SENTINEL)
+        if not sep:
+            # 子进程在输出结果前退出（如 os._exit），无法区分每段代码的结果
+            logger.warning(f"批量执行未返回结果: return_code={result.returncode}")
+            return [
+                ExecResult(
+                    stdout=result.stdout,
+                    stderr=result.stderr or "批量执行异常退出",
+                    return_code=result.returncode or 1,
+                )
+                for _ in codes
+            ]
+
+        results = [ExecResult(**item) for item in json.loads(payload)]
+        # 绕过 sys.stdout 直接写 fd 的输出（如子进程）归到第一段
+        if leaked or result.stderr:
+            results[0].stdout = leaked + results[0].stdout
+            results[0].stderr = result.stderr + results[0].stderr
+        return results
+
+    def _build_wrapper_script(
+        self,
+        code: str,
+        cwd: Optional[Path],
+        workspace: Optional[Path],
+    ) -> str:
+        """构建包装脚本，注入上下文"""
+        return _render_wrapper_script(
+            code,
+            str(self.tools_dir),
+            str(cwd) if cwd else "",
+            str(workspace) if workspace else "",
+        )
 
 
 class SkillExecutor:
@@ -249,7 +400,7 @@ class SkillExecutor:
     def __init__(self, config: "EnvManager"):
         self.config = config
         self.skills_dir = config.skills_dir
-        self._uv = _find_uv()
+        self._uv = _which_uv()
 
     def ensure_venv(self, skill_name: str) -> Path:
         """确保技能的虚拟环境存在，返回 Python 路径"""
@@ -319,7 +470,7 @@ class SkillExecutor:
             logger.debug(f"技能执行完成: return_code={result.returncode}")
             if result.returncode != 0:
                 logger.warning(
-                    f"技能返回非零: stderr={result.stderr[:200] if result.stderr else ''}"
+                    f"技能返回非零: stderr={_truncate(result.stderr)}"
                 )
             return ExecResult(
                 stdout=result.stdout,
@@ -5,11 +5,13 @@ AEPSession - 会话管理
 执行逻辑委托给专门的 Executor 组件。
 """
 
+from __future__ import annotations
+
 import os
 import shlex
 import subprocess
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from loguru import logger
 
@@ -24,7 +26,8 @@ class AEPSession:
     AEP 会话
 
     管理 Agent 与环境的交互，维护会话状态。
-    exec() 是唯一对外接口，执行逻辑委托给 Executor 组件。
+    exec() 是统一的命令入口，执行逻辑委托给 Executor 组件；
+    程序化调用可直接使用 session.tools / session.skills，跳过命令字符串解析。
 
     职责:
     - 命令解析与路由
@@ -36,16 +39,27 @@ class AEPSession:
     - Agent 通过 `tools run "tools.<mcp_name>.<method>(...)"` 统一调用
     """
 
-    def __init__(self, workspace: Path, config: "EnvManager"):
+    def __init__(
+        self,
+        workspace: Path,
+        config: "EnvManager",
+        mounts: Optional[dict[str, Path]] = None,
+    ):
         """
         初始化会话
 
         Args:
             workspace: 工作区目录
             config: 能力配置
+            mounts: 挂载名到已解析目录的映射（由 AEP.attach 预先计算），
+                缺省时使用 config 中的目录
         """
         self.workspace = workspace
         self.config = config
+        mounts = mounts or {}
+        self.tools_dir: Path = mounts.get("tools", config.tools_dir)
+        self.skills_dir: Path = mounts.get("skills", config.skills_dir)
+        self.library_dir: Path = mounts.get("library", config.library_dir)
         self.cwd = workspace  # 当前工作目录
         self.env: dict[str, str] = {}  # 自定义环境变量
 
@@ -53,11 +67,23 @@ class AEPSession:
         self.tool_executor = ToolExecutor(config)
         self.skill_executor = SkillExecutor(config)
 
+        # 内置命令分发表: 命令名 -> 处理器(args)
+        self._builtin_commands = {
+            "tools": self._handle_tools,
+            "skills": self._handle_skills,
+            "cd": self._handle_cd,
+            "export": self._handle_export,
+        }
+
+        # 编程接口: session.tools.run(code) 等价于 exec('tools run "code"')
+        self.tools = SessionTools(self)
+        self.skills = SessionSkills(self)
+
         logger.debug(f"Session 创建: workspace={workspace}")
 
     def exec(self, command: str) -> ExecResult:
         """
-        执行命令 (唯一对外接口)
+        执行命令 (统一命令入口)
 
         根据命令前缀路由到不同处理器：
         - tools ... -> _handle_tools()
@@ -91,20 +117,52 @@ class AEPSession:
         if not parts:
             return ExecResult()
 
-        cmd = parts[0]
-        args = parts[1:]
-
-        # 命令路由
-        if cmd == "tools":
-            return self._handle_tools(args)
-        elif cmd == "skills":
-            return self._handle_skills(args)
-        elif cmd == "cd":
-            return self._handle_cd(args)
-        elif cmd == "export":
-            return self._handle_export(args)
-        else:
+        # 命令路由：内置命令查表分发，其余透传给 shell
+        handler = self._builtin_commands.get(parts[0])
+        if handler is None:
             return self._shell_passthrough(command)
+        return handler(parts[1:])
+
+    def exec_many(self, commands: list[str]) -> list[ExecResult]:
+        """
+        按顺序执行多条命令
+
+        连续的 tools run "..." 命令会合并到同一个子进程中执行，
+        省去每条命令重新启动解释器和加载 tools 的开销；其余命令
+        仍逐条走 exec()，cd / export 等对后续命令的影响保持不变。
+        同一批次内工具模块的状态共享、超时按整批计算，详见
+        ToolExecutor.run_many。
+
+        Args:
+            commands: 要执行的命令列表
+
+        Returns:
+            与 commands 一一对应的 ExecResult 列表
+        """
+        results: list[ExecResult] = []
+        batch: list[str] = []
+
+        def flush() -> None:
+            if batch:
+                results.extend(
+                    self.tool_executor.run_many(
+                        batch, cwd=self.cwd, workspace=self.workspace
+                    )
+                )
+                batch.clear()
+
+        for command in commands:
+            stripped = command.strip()
+            if stripped.startswith("tools run "):
+                code = self._extract_quoted_code(stripped[10:].strip())
+                if code is not None:
+                    batch.append(code)
+                    continue
+            flush()
+            results.append(self.exec(command))
+
+        flush()
+        return results
 
     # ==================== Tools ====================
 
@@ -122,28 +180,19 @@ class AEPSession:
         subcmd = args[0]
 
         if subcmd == "list":
-            index_file = self.config.tools_dir / "index.md"
-            if index_file.exists():
-                return ExecResult(stdout=index_file.read_text(encoding="utf-8"))
-            return ExecResult(stdout="_暂无工具_\n")
+            return self.tools.list()
 
         elif subcmd == "info":
             if len(args) < 2:
                 return ExecResult(stderr="Usage: tools info <name>", return_code=1)
-            name = args[1]
-            return self._tools_info(name)
+            return self.tools.info(args[1])
 
         elif subcmd == "run":
             if len(args) < 2:
                 return ExecResult(
                     stderr='Usage: tools run "<python_code>"', return_code=1
                 )
-            code = args[1]
-            return self.tool_executor.run(
-                code=code,
-                cwd=self.cwd,
-                workspace=self.workspace,
-            )
+            return self.tools.run(args[1])
 
         else:
             return ExecResult(stderr=f"未知子命令: {subcmd}", return_code=1)
@@ -175,11 +224,7 @@ class AEPSession:
                 return_code=1,
             )
 
-        return self.tool_executor.run(
-            code=code,
-            cwd=self.cwd,
-            workspace=self.workspace,
-        )
+        return self.tools.run(code)
 
     def _extract_quoted_code(self, s: str) -> str | None:
         """
@@ -211,12 +256,12 @@ class AEPSession:
     def _tools_info(self, name: str) -> ExecResult:
         """获取工具详情"""
         # 查找 .md 文档
-        doc_file = self.config.tools_dir / f"{name}.md"
+        doc_file = self.tools_dir / f"{name}.md"
         if doc_file.exists():
             return ExecResult(stdout=doc_file.read_text(encoding="utf-8"))
 
         # 没有文档，尝试读取 py 文件的 docstring
-        py_file = self.config.tools_dir / f"{name}.py"
+        py_file = self.tools_dir / f"{name}.py"
         if py_file.exists():
             content = py_file.read_text(encoding="utf-8")
             # 简单提取顶层 docstring
@@ -244,32 +289,26 @@ class AEPSession:
         subcmd = args[0]
 
         if subcmd == "list":
-            index_file = self.config.skills_dir / "index.md"
-            if index_file.exists():
-                return ExecResult(stdout=index_file.read_text(encoding="utf-8"))
-            return ExecResult(stdout="_暂无技能_\n")
+            return self.skills.list()
 
         elif subcmd == "info":
             if len(args) < 2:
                 return ExecResult(stderr="Usage: skills info <name>", return_code=1)
-            name = args[1]
-            return self._skills_info(name)
+            return self.skills.info(args[1])
 
         elif subcmd == "run":
             if len(args) < 2:
                 return ExecResult(
                     stderr="Usage: skills run <path.py> [args]", return_code=1
                 )
-            script_path = args[1]
-            script_args = args[2:]
-            return self.skill_executor.run(script_path, script_args)
+            return self.skills.run(args[1], args[2:])
 
         else:
             return ExecResult(stderr=f"未知子命令: {subcmd}", return_code=1)
 
     def _skills_info(self, name: str) -> ExecResult:
         """获取技能详情"""
-        skill_dir = self.config.skills_dir / name
+        skill_dir = self.skills_dir / name
         if not skill_dir.is_dir():
             return ExecResult(stderr=f"技能不存在: {name}", return_code=1)
 
@@ -365,18 +404,75 @@ class AEPSession:
         parts = []
 
         # 工具索引 (包含 MCP 工具)
-        tools_index = self.config.tools_dir / "index.md"
+        tools_index = self.tools_dir / "index.md"
         if tools_index.exists():
             parts.append(tools_index.read_text(encoding="utf-8"))
 
         # 技能索引
-        skills_index = self.config.skills_dir / "index.md"
+        skills_index = self.skills_dir / "index.md"
         if skills_index.exists():
             parts.append(skills_index.read_text(encoding="utf-8"))
 
         # 资料索引
-        library_index = self.config.library_dir / "index.md"
+        library_index = self.library_dir / "index.md"
         if library_index.exists():
             parts.append(library_index.read_text(encoding="utf-8"))
 
         return "\n\n".join(parts)
+
+
+class SessionTools:
+    """
+    session.tools - tools 命令的编程接口
+
+    与 exec("tools ...") 结果一致，但不经过命令字符串解析，
+    代码也无需再用引号包裹。
+    """
+
+    def __init__(self, session: AEPSession):
+        self._session = session
+
+    def list(self) -> ExecResult:
+        """列出所有工具（tools/index.md）"""
+        index_file = self._session.tools_dir / "index.md"
+        if index_file.exists():
+            return ExecResult(stdout=index_file.read_text(encoding="utf-8"))
+        return ExecResult(stdout="_暂无工具_\n")
+
+    def info(self, name: str) -> ExecResult:
+        """查看工具详情"""
+        return self._session._tools_info(name)
+
+    def run(self, code: str) -> ExecResult:
+        """在当前 cwd 下执行 Python 代码"""
+        return self._session.tool_executor.run(
+            code=code,
+            cwd=self._session.cwd,
+            workspace=self._session.workspace,
+        )
+
+
+class SessionSkills:
+    """
+    session.skills - skills 命令的编程接口
+
+    与 exec("skills ...") 结果一致，但不经过命令字符串解析。
+    """
+
+    def __init__(self, session: AEPSession):
+        self._session = session
+
+    def list(self) -> ExecResult:
+        """列出所有技能（skills/index.md）"""
+        index_file = self._session.skills_dir / "index.md"
+        if index_file.exists():
+            return ExecResult(stdout=index_file.read_text(encoding="utf-8"))
+        return ExecResult(stdout="_暂无技能_\n")
+
+    def info(self, name: str) -> ExecResult:
+        """查看技能详情"""
+        return self._session._skills_info(name)
+
+    def run(self, script_path: str, args: Optional[list[str]] = None) -> ExecResult:
+        """执行技能脚本，script_path 形如 <skill>/<file>.py"""
+        return self._session.skill_executor.run(script_path, args or [])
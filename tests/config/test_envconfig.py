@@ -4,7 +4,7 @@ EnvConfig 路径属性测试
 
 from pathlib import Path
 
-from aep.core.config import EnvConfig
+from aep.core.config import EnvConfig, LibraryConfig, ToolConfig
 
 
 class TestEnvConfigPaths:
@@ -39,3 +39,25 @@ class TestEnvConfigPaths:
             config.skill_requirements("scraper")
             == config.skills_dir / "scraper" / "requirements.txt"
         )
+
+
+class TestConfigRecords:
+    """测试 ToolConfig / LibraryConfig 序列化"""
+
+    def test_from_dict_keeps_source_string(self):
+        """from_dict 保留字符串 source，source_path 按需转换"""
+        config = ToolConfig.from_dict({"name": "grep", "source": "/src/grep.py"})
+
+        assert config.source == "/src/grep.py"
+        assert config.source_path == Path("/src/grep.py")
+        assert config.to_dict() == {
+            "name": "grep",
+            "source": "/src/grep.py",
+            "dependencies": [],
+        }
+
+    def test_library_round_trip(self):
+        """LibraryConfig to_dict / from_dict 往返一致"""
+        data = {"name": "api.md", "source": "/docs/api.md"}
+
+        assert LibraryConfig.from_dict(data).to_dict() == data
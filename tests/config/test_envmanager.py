@@ -33,6 +33,17 @@ class TestEnvManagerInit:
         manager = EnvManager(config_dir)
         assert manager.config.config_dir == config_dir.resolve()
 
+    def test_init_creates_missing_subdirs(self, tmp_path: Path):
+        """已存在的配置目录缺少部分子目录时补齐"""
+        config_dir = tmp_path / "config"
+        (config_dir / "tools").mkdir(parents=True)
+
+        manager = EnvManager(config_dir)
+
+        assert manager.config.skills_dir.is_dir()
+        assert manager.config.library_dir.is_dir()
+        assert manager.config.mcp_config_dir.is_dir()
+
     def test_handlers_accessible(self, tmp_path: Path):
         """处理器可访问"""
         manager = EnvManager(tmp_path / "config")
@@ -41,6 +52,13 @@ class TestEnvManagerInit:
         assert isinstance(manager.skills, SkillsHandler)
         assert isinstance(manager.library, LibraryHandler)
 
+    def test_handlers_created_lazily(self, tmp_path: Path):
+        """处理器在首次访问时创建，之后复用同一实例"""
+        manager = EnvManager(tmp_path / "config")
+
+        assert manager._mcp is None
+        assert manager.mcp is manager.mcp
+
 
 class TestEnvManagerIndex:
     """测试 index 方法"""
@@ -105,6 +123,37 @@ description: Scrape content from test pages.
         content = index.read_text()
         assert "readme.md" in content
 
+    def test_index_skips_when_unchanged(
+        self, manager_with_content: EnvManager, monkeypatch
+    ):
+        """内容未变化时重复 index() 不重新生成"""
+        manager_with_content.index()
+
+        calls = []
+        monkeypatch.setattr(
+            manager_with_content.tools, "generate_index", lambda: calls.append(1)
+        )
+        manager_with_content.index()
+        assert calls == []
+
+    def test_index_regenerates_after_change(
+        self, manager_with_content: EnvManager, tmp_path: Path
+    ):
+        """新增资料或删除索引文件后重新生成"""
+        manager_with_content.index()
+
+        doc = tmp_path / "guide.md"
+        doc.write_text("# Guide")
+        manager_with_content.library.add(doc)
+        manager_with_content.index()
+        index = manager_with_content.config.library_dir / "index.md"
+        assert "guide.md" in index.read_text()
+
+        tools_index = manager_with_content.config.tools_dir / "index.md"
+        tools_index.unlink()
+        manager_with_content.index()
+        assert tools_index.exists()
+
 
 class TestEnvManagerConvenienceMethods:
     """测试 EnvManager 便捷方法（代理到处理器）"""
@@ -211,3 +260,29 @@ class TestEnvManagerToolEnvironment:
             dependencies=["mcp"],
             include_default=False,
         )
+
+    def test_init_environments_syncs_tools_and_skills(self, tmp_path: Path):
+        """init_environments 同步 tools 和所有技能环境"""
+        manager = EnvManager(tmp_path / "config")
+        for name in ("alpha", "beta"):
+            manager.config.skill_dir(name).mkdir()
+
+        with patch.object(manager.tools, "sync_dependencies") as tools_sync:
+            with patch.object(manager.skills, "sync_dependencies") as skills_sync:
+                manager.init_environments(skills=["alpha", "beta"])
+
+        tools_sync.assert_called_once_with()
+        assert sorted(c.args[0] for c in skills_sync.call_args_list) == [
+            "alpha",
+            "beta",
+        ]
+
+    def test_init_environments_raises_first_error(self, tmp_path: Path):
+        """任一环境失败时抛出异常"""
+        manager = EnvManager(tmp_path / "config")
+
+        with patch.object(
+            manager.tools, "sync_dependencies", side_effect=RuntimeError("boom")
+        ):
+            with pytest.raises(RuntimeError, match="boom"):
+                manager.init_environments(skills=[])
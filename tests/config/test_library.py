@@ -30,6 +30,42 @@ class TestLibraryHandler:
         assert result.name == "api.md"
         assert result.parent == manager.config.library_dir
 
+    def test_add_library_is_independent_of_source(
+        self, manager: EnvManager, sample_doc: Path
+    ):
+        """资料是独立副本：修改副本不影响源文件，删除源文件后仍然可读"""
+        result = manager.library.add(sample_doc)
+
+        assert result.stat().st_ino != sample_doc.stat().st_ino
+        with result.open("a") as f:
+            f.write("local note\n")
+        assert "local note" not in sample_doc.read_text()
+
+        sample_doc.unlink()
+        assert "API Documentation" in result.read_text()
+
+    def test_add_library_falls_back_to_copy(
+        self, manager: EnvManager, sample_doc: Path, monkeypatch
+    ):
+        """无法 reflink 时（如 ext4/tmpfs）回退为复制"""
+        monkeypatch.setattr(
+            "aep.core.config.handlers.base._reflink", lambda *args: False
+        )
+        result = manager.library.add(sample_doc)
+
+        assert result.stat().st_ino != sample_doc.stat().st_ino
+        assert result.read_text() == sample_doc.read_text()
+
+    def test_add_library_twice_overwrites(self, manager: EnvManager, sample_doc: Path):
+        """重复添加同名资料会替换目标"""
+        other = sample_doc.parent / "other.md"
+        other.write_text("# Other")
+        manager.library.add(sample_doc, name="docs.md")
+        result = manager.library.add(other, name="docs.md")
+
+        assert result.read_text() == "# Other"
+        assert sample_doc.read_text().startswith("# API Documentation")
+
     def test_add_library_with_custom_name(self, manager: EnvManager, sample_doc: Path):
         """指定自定义名称"""
         result = manager.library.add(sample_doc, name="docs.md")
@@ -4,13 +4,20 @@ MCPHandler 集成测试
 使用 tests/mcp/echo_server.py 作为真实 MCP 服务器进行测试。
 """
 
+import ast
+import asyncio
+import importlib.util
+import json
+import os
 import sys
 import pytest
 from pathlib import Path
+from unittest.mock import patch
 
 from aep import EnvManager
 from aep.core.config.envconfig import MCPServerConfig
-from aep.core.config.handlers.mcp import MCPHandler, MCPTransport
+from aep.core.config.handlers.base import atomic_open, atomic_write_bytes, write_if_changed
+from aep.core.config.handlers.mcp import _STUB_RESERVED_NAMES, MCPHandler, MCPTransport
 
 # Echo server 路径
 ECHO_SERVER = str(Path(__file__).parent.parent / "mcp" / "echo_server.py")
@@ -85,6 +92,9 @@ class TestMCPAddStdio:
         # add(a: int, b: int) 应有 a, b 参数
         assert "a: int" in content
         assert "b: int" in content
+        # 参数显式组装为字典，不依赖 locals()
+        assert "{'a': a, 'b': b}" in content
+        assert "locals()" not in content
 
     def test_config_saved(self, handler: MCPHandler):
         """配置文件正确保存"""
@@ -100,6 +110,25 @@ class TestMCPAddStdio:
         assert config.command[0] == sys.executable
         assert ECHO_SERVER in config.command
 
+    def test_discovered_tools_recorded(self, handler: MCPHandler):
+        """发现的工具记录在 config.json 中"""
+        handler.add("echo", command=sys.executable, args=[ECHO_SERVER])
+
+        config = handler.get_config("echo")
+        assert sorted(t["name"] for t in config.tools) == ["add", "echo"]
+
+    def test_readd_same_config_skips_discovery(self, handler: MCPHandler):
+        """相同连接参数再次添加时复用已记录的工具，force=True 时重新发现"""
+        handler.add("echo", command=sys.executable, args=[ECHO_SERVER])
+
+        with patch.object(handler, "_discover", side_effect=AssertionError):
+            stub = handler.add("echo", command=sys.executable, args=[ECHO_SERVER])
+        assert "def echo(" in stub.read_text(encoding="utf-8")
+
+        with patch.object(handler, "_discover", wraps=handler._discover) as discover:
+            handler.add("echo", command=sys.executable, args=[ECHO_SERVER], force=True)
+        discover.assert_called_once()
+
     def test_no_prompt_docs_generated(self, handler: MCPHandler, manager: EnvManager):
         """tool-only 模式下不生成 SKILL.md 文档"""
         handler.add(
@@ -113,6 +142,208 @@ class TestMCPAddStdio:
         assert not skill_md.exists()
 
 
+class TestMCPAddMany:
+    """测试批量添加 MCP 服务器"""
+
+    @pytest.fixture
+    def handler(self, tmp_path: Path) -> MCPHandler:
+        return EnvManager(tmp_path / "config").mcp
+
+    def test_add_many_generates_all_stubs(self, handler: MCPHandler):
+        """并发添加多个服务器，返回顺序与输入一致"""
+        stubs = handler.add_many(
+            [
+                {"name": "echo_a", "command": sys.executable, "args": [ECHO_SERVER]},
+                {"name": "echo_b", "command": sys.executable, "args": [ECHO_SERVER]},
+            ]
+        )
+
+        assert [s.name for s in stubs] == ["echo_a.py", "echo_b.py"]
+        assert "def echo(" in stubs[1].read_text(encoding="utf-8")
+        assert sorted(handler.list()) == ["echo_a", "echo_b"]
+
+    def test_add_many_reuses_recorded_tools(self, handler: MCPHandler):
+        """已记录工具的服务器批量添加时不再连接"""
+        spec = {"name": "echo", "command": sys.executable, "args": [ECHO_SERVER]}
+        handler.add_many([spec])
+
+        with patch.object(handler, "_discover", side_effect=AssertionError):
+            stubs = handler.add_many([spec])
+        assert "def echo(" in stubs[0].read_text(encoding="utf-8")
+
+    def test_add_many_reports_failures(self, handler: MCPHandler, tmp_path: Path):
+        """部分服务器失败时抛出异常，成功的仍生成 stub"""
+        with pytest.raises(RuntimeError, match="broken"):
+            handler.add_many(
+                [
+                    {"name": "echo", "command": sys.executable, "args": [ECHO_SERVER]},
+                    {
+                        "name": "broken",
+                        "command": sys.executable,
+                        "args": [str(tmp_path / "missing_server.py")],
+                    },
+                ]
+            )
+
+        assert handler.config.tool_path("echo").exists()
+        assert not handler.config.tool_path("broken").exists()
+        assert handler.get_config("echo") is not None
+        assert handler.get_config("broken") is None
+        assert handler.list() == ["echo"]
+
+    def test_add_many_validates_before_saving(self, handler: MCPHandler):
+        """任一 spec 不合法时不连接、不保存任何配置"""
+        with patch.object(handler, "_discover", side_effect=AssertionError):
+            with pytest.raises(RuntimeError, match="未找到命令"):
+                handler.add_many(
+                    [
+                        {"name": "echo", "command": sys.executable},
+                        {"name": "missing", "command": "no-such-command-xyz"},
+                    ]
+                )
+
+        assert handler.get_config("echo") is None
+        assert handler.list() == []
+
+    def test_add_many_rejects_duplicate_names(self, handler: MCPHandler):
+        """多个 spec 使用同一名称时拒绝添加"""
+        spec = {"name": "echo", "command": sys.executable, "args": [ECHO_SERVER]}
+        with pytest.raises(ValueError, match="名称重复"):
+            handler.add_many([spec, dict(spec, args=[])])
+
+        assert handler.get_config("echo") is None
+
+
+class TestMCPToolMethods:
+    """测试工具函数代码生成"""
+
+    def test_parameter_named_arguments(self, tmp_path: Path):
+        """名为 arguments 的可选参数不会被生成代码中的局部变量覆盖"""
+        handler = EnvManager(tmp_path / "config").mcp
+        code = handler._build_tool_methods(
+            [
+                {
+                    "name": "run",
+                    "inputSchema": {
+                        "properties": {
+                            "command": {"type": "string"},
+                            "arguments": {"type": "array"},
+                        },
+                        "required": ["command"],
+                    },
+                }
+            ]
+        )
+
+        sent = {}
+        namespace = {"_invoke": lambda name, args: sent.update(args)}
+        exec(code, namespace)
+        namespace["run"]("ls", arguments=["-l"])
+
+        assert sent == {"command": "ls", "arguments": ["-l"]}
+
+    def test_unchanged_tool_code_reused(self, tmp_path: Path):
+        """相同的工具定义只生成一次代码"""
+        handler = EnvManager(tmp_path / "config").mcp
+        tools = [{"name": "ping", "inputSchema": {}}]
+
+        first = handler._build_tool_methods(tools)
+        with patch.object(handler, "_write_method", side_effect=AssertionError):
+            second = handler._build_tool_methods([{"inputSchema": {}, "name": "ping"}])
+
+        assert first == second
+
+    def test_invalid_identifiers_are_mangled(self, tmp_path: Path):
+        """工具名/参数名不是合法标识符时转换函数名，调用时仍使用原始名称"""
+        handler = EnvManager(tmp_path / "config").mcp
+        tools = [
+            {
+                "name": "get-item",
+                "inputSchema": {
+                    "properties": {
+                        "max-results": {"type": "integer"},
+                        "from": {"type": "string"},
+                    },
+                    "required": ["from"],
+                },
+            },
+            {"name": "get_item", "inputSchema": {}},
+            {"name": "class", "inputSchema": {}},
+            {"name": "call", "inputSchema": {}},
+            {"name": "class", "inputSchema": {}},
+        ]
+
+        code = handler._build_tool_methods(tools)
+        sent = []
+        namespace = {"_invoke": lambda name, args: sent.append((name, args))}
+        exec(compile(code, "<stub>", "exec"), namespace)
+
+        namespace["get_item"](from_="a", max_results=5)
+        namespace["get_item_2"]()
+        namespace["class_"]()
+        namespace["call_2"]()
+
+        assert sent == [
+            ("get-item", {"from": "a", "max-results": 5}),
+            ("get_item", {}),
+            ("class", {}),
+            ("call", {}),
+        ]
+        assert code.count("def class_") == 1
+
+    def test_tool_names_do_not_shadow_stub_runtime(self, tmp_path: Path):
+        """与 stub 运行时/连接模板同名的工具改名，不覆盖模块级定义"""
+        handler = EnvManager(tmp_path / "config").mcp
+        runtime_names = ["_invoke", "_connect", "_call_mcp", "_get_session", "_loop"]
+        tools = [{"name": n, "inputSchema": {}} for n in runtime_names]
+
+        for transport, config in (
+            (MCPTransport.STDIO, MCPServerConfig(name="s", transport="stdio", command=["py"])),
+            (MCPTransport.HTTP, MCPServerConfig(name="h", transport="http", url="http://x")),
+        ):
+            stub = handler._generate_stub(config.name, transport, config, tools)
+            tree = ast.parse(stub.read_text(encoding="utf-8"))
+
+            defined: list[str] = []
+            for node in tree.body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    defined.append(node.name)
+                elif isinstance(node, ast.Assign):
+                    defined.extend(t.id for t in node.targets if isinstance(t, ast.Name))
+                elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                    defined.extend(a.asname or a.name for a in node.names)
+
+            # 每个名称只定义一次，工具函数都带后缀
+            assert len(defined) == len(set(defined))
+            assert {f"{n}_2" for n in runtime_names} <= set(defined)
+            # 保留名单覆盖 stub 自身的所有模块级名称
+            tool_funcs = {f"{n}_2" for n in runtime_names}
+            assert set(defined) - tool_funcs <= _STUB_RESERVED_NAMES
+
+    def test_stub_compiles_with_quotes_in_descriptions(self, tmp_path: Path):
+        """描述中含三引号和反斜杠时生成的 stub 仍可编译"""
+        handler = EnvManager(tmp_path / "config").mcp
+        config = MCPServerConfig(name="odd", transport="stdio", command=["python"])
+        description = 'Use """quotes""" and C:\\path\\n'
+        tools = [
+            {
+                "name": "odd_tool",
+                "description": description,
+                "inputSchema": {
+                    "properties": {"p": {"type": "string", "description": description}},
+                    "required": ["p"],
+                },
+            }
+        ]
+
+        stub = handler._generate_stub("odd", MCPTransport.STDIO, config, tools)
+        namespace: dict = {}
+        exec(compile(stub.read_text(encoding="utf-8"), str(stub), "exec"), namespace)
+
+        assert namespace["__doc__"].count('"""quotes"""') == 1
+        assert description in namespace["odd_tool"].__doc__
+
+
 class TestMCPList:
     """测试列出 MCP 服务器"""
 
@@ -136,6 +367,50 @@ class TestMCPList:
         servers = handler.list()
         assert "echo" in servers
 
+    def test_list_many_servers(self, handler: MCPHandler):
+        """服务器较多（并发检查路径）时结果与逐个检查一致"""
+        mcp_dir = handler.config.mcp_config_dir
+        for i in range(40):
+            server_dir = mcp_dir / f"server_{i}"
+            server_dir.mkdir()
+            if i % 2 == 0:
+                (server_dir / "config.json").write_text("{}", encoding="utf-8")
+
+        assert sorted(handler.list()) == sorted(f"server_{i}" for i in range(0, 40, 2))
+
+    def test_list_reads_index_without_scanning(self, handler: MCPHandler, monkeypatch):
+        """已有索引时 list() 只读索引，不扫描服务器目录"""
+        handler.add("echo", command=sys.executable, args=[ECHO_SERVER])
+        assert (handler.config.mcp_config_dir / ".index.json").is_file()
+
+        def fail_scan():
+            raise AssertionError("不应扫描目录")
+
+        monkeypatch.setattr(handler, "_scan_servers", fail_scan)
+        assert handler.list() == ["echo"]
+
+    def test_list_rebuilds_missing_index(self, handler: MCPHandler):
+        """索引缺失或损坏时回退扫描并重建索引"""
+        handler.add("echo", command=sys.executable, args=[ECHO_SERVER])
+        index_file = handler.config.mcp_config_dir / ".index.json"
+
+        index_file.write_text("not json", encoding="utf-8")
+        assert handler.list() == ["echo"]
+        assert json.loads(index_file.read_text(encoding="utf-8")) == ["echo"]
+
+        index_file.unlink()
+        assert handler.list() == ["echo"]
+        assert index_file.is_file()
+
+    def test_remove_updates_index(self, handler: MCPHandler):
+        """remove 后索引同步移除该服务器"""
+        handler.add("echo", command=sys.executable, args=[ECHO_SERVER])
+        handler.remove("echo")
+
+        index_file = handler.config.mcp_config_dir / ".index.json"
+        assert json.loads(index_file.read_text(encoding="utf-8")) == []
+        assert handler.list() == []
+
     def test_list_multiple(self, handler: MCPHandler):
         """多个服务器"""
         handler.add(
@@ -246,12 +521,133 @@ class TestMCPRefresh:
         content = stub.read_text(encoding="utf-8")
         assert "def echo(" in content
 
+    def test_add_and_refresh_reuse_loop(self, handler: MCPHandler):
+        """add 与 refresh 复用同一个事件循环，close 后释放"""
+        handler.add("echo", command=sys.executable, args=[ECHO_SERVER])
+        loop = handler._loop
+
+        handler.refresh("echo")
+        assert handler._loop is loop
+
+        handler.close()
+        assert loop.is_closed()
+        assert handler._loop is None
+
+    def test_add_inside_running_loop(self, handler: MCPHandler):
+        """在已运行的事件循环中（如 Jupyter）也能同步调用 add"""
+        async def main():
+            return handler.add("echo", command=sys.executable, args=[ECHO_SERVER])
+
+        stub = asyncio.run(main())
+        assert "def echo(" in stub.read_text(encoding="utf-8")
+        handler.close()
+
+    def test_unchanged_refresh_keeps_files(self, handler: MCPHandler):
+        """工具未变化时 refresh 和重复 add 不重写 stub 与 config.json"""
+        stub = handler.add("echo", command=sys.executable, args=[ECHO_SERVER])
+        config_file = handler.config.mcp_config_path("echo") / "config.json"
+        for path in (stub, config_file):
+            os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+        handler.refresh("echo")
+        handler.add("echo", command=sys.executable, args=[ECHO_SERVER])
+
+        assert stub.stat().st_mtime_ns == 1_000_000_000
+        assert config_file.stat().st_mtime_ns == 1_000_000_000
+
+    def test_refresh_all(self, handler: MCPHandler):
+        """refresh_all 并发刷新所有已配置的服务器"""
+        handler.add_many(
+            [
+                {"name": "echo_a", "command": sys.executable, "args": [ECHO_SERVER]},
+                {"name": "echo_b", "command": sys.executable, "args": [ECHO_SERVER]},
+            ]
+        )
+        for name in ("echo_a", "echo_b"):
+            handler.config.tool_path(name).unlink()
+
+        stubs = handler.refresh_all()
+
+        assert sorted(s.name for s in stubs) == ["echo_a.py", "echo_b.py"]
+        assert all("def echo(" in s.read_text(encoding="utf-8") for s in stubs)
+
     def test_refresh_nonexistent_raises(self, handler: MCPHandler):
         """刷新不存在的服务器抛出异常"""
         with pytest.raises(FileNotFoundError):
             handler.refresh("nonexistent")
 
 
+class TestMCPStubSession:
+    """测试生成的 stub 在进程内复用连接"""
+
+    @pytest.fixture
+    def stub_module(self, tmp_path: Path):
+        manager = EnvManager(tmp_path / "config")
+        stub = manager.mcp.add("echo", command=sys.executable, args=[ECHO_SERVER])
+
+        spec = importlib.util.spec_from_file_location("echo_stub", stub)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+        module._shutdown()
+
+    def test_calls_share_one_session(self, stub_module):
+        """多次调用复用同一个 MCP 会话"""
+        assert stub_module.echo(message="hi") == "Echo: hi"
+        session = stub_module._session
+
+        assert stub_module.add(a=1, b=2) == "3"
+        assert stub_module.call("echo", message="again") == "Echo: again"
+        assert stub_module._session is session
+
+    def test_call_inside_running_loop(self, stub_module):
+        """在已运行的事件循环中（如 Jupyter）也能同步调用"""
+        async def main():
+            return stub_module.echo(message="loop")
+
+        assert asyncio.run(main()) == "Echo: loop"
+
+
+class TestAtomicWrite:
+    """测试 config.json / stub 使用的原子写入"""
+
+    def test_failed_write_keeps_original(self, tmp_path: Path):
+        """写入中途出错时原文件不变，也不留下临时文件"""
+        target = tmp_path / "config.json"
+        target.write_bytes(b"old")
+
+        with pytest.raises(RuntimeError):
+            with atomic_open(target) as f:
+                f.write(b"partial")
+                raise RuntimeError("boom")
+
+        assert target.read_bytes() == b"old"
+        assert list(tmp_path.iterdir()) == [target]
+
+    def test_write_replaces_content(self, tmp_path: Path):
+        """正常写入后替换为新内容"""
+        target = tmp_path / "config.json"
+        target.write_bytes(b"old")
+
+        atomic_write_bytes(target, b"new")
+
+        assert target.read_bytes() == b"new"
+        assert list(tmp_path.iterdir()) == [target]
+
+    def test_write_if_changed_skips_identical(self, tmp_path: Path):
+        """内容相同时不写入，mtime 不变；内容不同时写入"""
+        target = tmp_path / "config.json"
+        target.write_bytes(b"same")
+        os.utime(target, ns=(1_000_000_000, 1_000_000_000))
+
+        assert write_if_changed(target, b"same") is False
+        assert target.stat().st_mtime_ns == 1_000_000_000
+
+        assert write_if_changed(target, b"diff") is True
+        assert target.read_bytes() == b"diff"
+        assert write_if_changed(tmp_path / "new.json", b"x") is True
+
+
 class TestMCPValidation:
     """测试参数验证"""
 
@@ -275,6 +671,23 @@ class TestMCPValidation:
         with pytest.raises(RuntimeError, match="未找到命令"):
             handler.add("test", command="nonexistent_cmd_xyz_12345")
 
+    def test_prerequisite_lookup_cached(self, handler: MCPHandler, monkeypatch):
+        """同一命令只查找一次 PATH，refresh_prerequisites 后重新查找"""
+        calls = []
+
+        def fake_which(command):
+            calls.append(command)
+            return f"/usr/bin/{command}"
+
+        monkeypatch.setattr("aep.core.config.handlers.mcp.shutil.which", fake_which)
+        handler._check_prerequisites("npx")
+        handler._check_prerequisites("npx")
+        assert calls == ["npx"]
+
+        handler.refresh_prerequisites()
+        handler._check_prerequisites("npx")
+        assert calls == ["npx", "npx"]
+
 
 class TestMCPHTTPConnectCode:
     """测试 Streamable HTTP 连接代码生成"""
@@ -318,3 +731,21 @@ class TestMCPHTTPConnectCode:
 
         assert "stdio_client" in stdio_code
         assert "streamable_http_client" in http_code
+
+    def test_connect_code_embeds_python_literals(self, handler: MCPHandler):
+        """连接参数以 Python 字面量嵌入，含引号与非 ASCII 字符时仍可还原"""
+        config = MCPServerConfig(
+            name="remote",
+            transport="http",
+            url="http://localhost:8000/mcp?q='x'",
+            headers={"X-Note": '说明 "quoted"'},
+        )
+
+        connect_code = handler._build_http_connect_code(config)
+        namespace: dict = {}
+        for line in connect_code.splitlines():
+            if line.startswith(("_MCP_URL =", "_MCP_HEADERS =")):
+                exec(line, namespace)
+
+        assert namespace["_MCP_URL"] == config.url
+        assert namespace["_MCP_HEADERS"] == config.headers
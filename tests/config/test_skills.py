@@ -8,6 +8,7 @@ from pathlib import Path
 from unittest.mock import patch
 
 from aep import EnvManager
+from aep.core.config.handlers.skills_util import parse_frontmatter, read_frontmatter_text
 
 
 class TestSkillsHandler:
@@ -59,6 +60,24 @@ description: Single file skill used for tests.
         assert (result / "main.py").exists()
         assert (result / "utils.py").exists()
 
+    def test_add_skill_with_many_nested_files(
+        self, manager: EnvManager, sample_skill_dir: Path
+    ):
+        """文件较多（并发放置路径）时嵌套目录与内容完整复制"""
+        nested = sample_skill_dir / "scripts" / "lib"
+        nested.mkdir(parents=True)
+        for i in range(40):
+            (nested / f"mod_{i}.py").write_text(f"VALUE = {i}")
+        (sample_skill_dir / "empty").mkdir()
+
+        result = manager.skills.add(sample_skill_dir)
+
+        copied = sorted(p.name for p in (result / "scripts" / "lib").iterdir())
+        assert copied == sorted(f"mod_{i}.py" for i in range(40))
+        assert (result / "scripts" / "lib" / "mod_7.py").read_text() == "VALUE = 7"
+        assert (result / "empty").is_dir()
+        assert (result / "main.py").exists()
+
     def test_add_skill_from_file(self, manager: EnvManager, sample_skill_file: Path):
         """从单文件添加技能"""
         result = manager.skills.add(sample_skill_file)
@@ -82,6 +101,18 @@ description: Single file skill used for tests.
             assert "requests" in content
             assert "pandas>=1.5" in content
 
+    def test_frontmatter_read_stops_at_closing_fence(self, tmp_path: Path):
+        """只读取 frontmatter，正文很大时不整篇读入"""
+        skill = tmp_path / "SKILL.md"
+        skill.write_text(
+            "---\nname: big-skill\ndescription: Large body.\n---\n" + "x" * 100_000
+        )
+
+        text = read_frontmatter_text(skill)
+
+        assert text == "---\nname: big-skill\ndescription: Large body.\n---"
+        assert parse_frontmatter(text)[0]["name"] == "big-skill"
+
     def test_add_skill_single_file_requires_md(self, manager: EnvManager, tmp_path: Path):
         """单文件技能仅允许 md"""
         bad_file = tmp_path / "bad.py"
@@ -109,6 +140,33 @@ description: Single file skill used for tests.
         manager.skills.add(sample_skill_dir)
         assert manager.skills.remove("my-skill")
         assert "my-skill" not in manager.skills.list()
+        assert manager.skills.remove("my-skill") is False
+
+    def test_generate_index_reuses_cached_properties(
+        self, manager: EnvManager, sample_skill_dir: Path
+    ):
+        """SKILL.md 未变化时不重新解析，修改后重新解析"""
+        skill_dir = manager.skills.add(sample_skill_dir)
+        manager.skills.generate_index()
+        assert (manager.skills_dir / ".index_cache.json").is_file()
+
+        # 新实例从磁盘缓存读取，不调用 read_properties
+        handler = EnvManager(manager.config_dir).skills
+        with patch(
+            "aep.core.config.handlers.skills.read_properties",
+            side_effect=AssertionError("不应重新解析"),
+        ):
+            handler.generate_index()
+        index = (manager.skills_dir / "index.md").read_text(encoding="utf-8")
+        assert "Test skill for handler unit tests." in index
+
+        skill_md = skill_dir / "SKILL.md"
+        skill_md.write_text(
+            "---\nname: my-skill\ndescription: Updated description.\n---\n"
+        )
+        handler.generate_index()
+        index = (manager.skills_dir / "index.md").read_text(encoding="utf-8")
+        assert "Updated description." in index
 
     def test_generate_index_uses_name_description_and_path(
         self, manager: EnvManager, sample_skill_file: Path
@@ -2,12 +2,16 @@
 ToolsHandler 测试
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from pathlib import Path
 
 from unittest.mock import patch
 
 from aep import EnvManager
+from aep.core.config.handlers.base import _reflink
 
 
 class TestToolsHandler:
@@ -66,6 +70,19 @@ class TestToolsHandler:
         tools = manager.tools.list()
         assert "my_tool" in tools
 
+    def test_list_cached_until_directory_changes(
+        self, manager: EnvManager, sample_tool: Path
+    ):
+        """目录未变化时复用扫描结果，目录中新增文件后重新扫描"""
+        manager.tools.add(sample_tool)
+        assert manager.tools.list() == ["my_tool"]
+
+        with patch("os.scandir", side_effect=AssertionError("不应重新扫描")):
+            assert manager.tools.list() == ["my_tool"]
+
+        (manager.config.tools_dir / "other.py").write_text("")
+        assert sorted(manager.tools.list()) == ["my_tool", "other"]
+
     def test_remove_tool(self, manager: EnvManager, sample_tool: Path):
         """删除工具"""
         manager.tools.add(sample_tool)
@@ -82,3 +99,179 @@ class TestToolsHandler:
             content = req_file.read_text()
             assert "httpx" in content
             assert "pydantic>=2.0" in content
+
+    def test_add_many_installs_once(self, manager: EnvManager, tmp_path: Path):
+        """批量添加工具时合并依赖，只安装一次"""
+        sources = []
+        for stem in ("alpha", "beta"):
+            tool = tmp_path / f"{stem}.py"
+            tool.write_text("def func(): pass")
+            sources.append(tool)
+
+        with patch.object(manager.tools, "install_dependencies") as install:
+            results = manager.tools.add_many(
+                [
+                    (sources[0], None, ["requests", "numpy"]),
+                    (sources[1], "renamed", ["numpy"]),
+                ]
+            )
+
+        assert [p.name for p in results] == ["alpha.py", "renamed.py"]
+        assert all(p.exists() for p in results)
+        install.assert_called_once()
+        assert install.call_args.args[1] == ["requests", "numpy"]
+
+    def test_add_many_missing_source_copies_nothing(
+        self, manager: EnvManager, sample_tool: Path, tmp_path: Path
+    ):
+        """任一源文件不存在时报错，且不复制任何工具"""
+        with pytest.raises(FileNotFoundError):
+            manager.tools.add_many(
+                [(sample_tool, None, None), (tmp_path / "missing.py", None, None)]
+            )
+
+        assert manager.tools.list() == []
+
+    def test_add_many_rejects_duplicate_names(
+        self, manager: EnvManager, tmp_path: Path
+    ):
+        """不同目录下同名的源文件对应同一工具时报错，且不复制、不改动源文件"""
+        sources = []
+        for sub in ("a", "b"):
+            (tmp_path / sub).mkdir()
+            tool = tmp_path / sub / "tool.py"
+            tool.write_text(f"NAME = {sub!r}")
+            sources.append(tool)
+
+        with pytest.raises(ValueError, match="tool"):
+            manager.tools.add_many([(src, None, None) for src in sources])
+
+        assert manager.tools.list() == []
+        assert sources[0].read_text() == "NAME = 'a'"
+        assert sources[1].read_text() == "NAME = 'b'"
+
+    def test_reflink_keeps_existing_target(self, tmp_path: Path):
+        """克隆时目标已存在则放弃，不截断也不删除该文件"""
+        source = tmp_path / "src.py"
+        source.write_text("source")
+        target = tmp_path / "dst.py"
+        target.write_text("someone else")
+
+        assert _reflink(source, target) is False
+        assert target.read_text() == "someone else"
+
+    def test_install_targets_venv_by_path(self, manager: EnvManager):
+        """安装依赖时通过 --python 指定 venv，不复制进程环境"""
+        venv_dir = manager.config.tools_venv_dir
+        with patch("aep.core.config.handlers.base.subprocess.run") as run:
+            manager.tools.install_dependencies(venv_dir, ["httpx"])
+
+        cmd = run.call_args.args[0]
+        assert cmd[cmd.index("--python") + 1] == str(venv_dir)
+        assert "env" not in run.call_args.kwargs
+
+    def test_save_requirements_appends_only_new(self, manager: EnvManager):
+        """只追加新依赖，保留已有内容和注释"""
+        req_file = manager.config.tools_requirements
+        req_file.write_text("  # pinned\nhttpx\n")
+
+        manager.tools.save_requirements(req_file, ["httpx", "pydantic"])
+        assert req_file.read_text() == "  # pinned\nhttpx\npydantic\n"
+
+        mtime = req_file.stat().st_mtime_ns
+        manager.tools.save_requirements(req_file, ["pydantic"])
+        assert req_file.stat().st_mtime_ns == mtime
+
+
+class TestToolsVenvCache:
+    """测试 AEP_VENV_CACHE 共享 venv"""
+
+    INSTALL = "aep.core.config.handlers.base.BaseHandler.install_from_requirements"
+
+    @pytest.fixture
+    def manager(self, tmp_path: Path) -> EnvManager:
+        return EnvManager(tmp_path / "config")
+
+    @pytest.fixture
+    def cache_root(self, tmp_path: Path, monkeypatch) -> Path:
+        root = tmp_path / "venv-cache"
+        monkeypatch.setenv("AEP_VENV_CACHE", str(root))
+        return root
+
+    def test_same_requirements_share_venv(self, tmp_path: Path, cache_root: Path):
+        """相同依赖的配置目录链接到同一个缓存 venv"""
+        managers = [EnvManager(tmp_path / f"config{i}") for i in range(2)]
+        with patch(self.INSTALL) as install:
+            for manager in managers:
+                manager.tools.add_dependencies("httpx")
+
+        venvs = [m.config.tools_venv_dir for m in managers]
+        assert all(v.is_symlink() for v in venvs)
+        assert venvs[0].resolve() == venvs[1].resolve()
+        assert venvs[0].resolve().parent == cache_root.resolve()
+        # 第二个配置目录直接复用，不再安装
+        assert install.call_count == 1
+
+    def test_changed_requirements_relink(self, manager: EnvManager, cache_root: Path):
+        """依赖变化后链接到新的缓存 venv，旧缓存保留"""
+        with patch(self.INSTALL):
+            manager.tools.add_dependencies("httpx")
+            first = manager.config.tools_venv_dir.resolve()
+            manager.tools.add_dependencies("pydantic")
+
+        assert manager.config.tools_venv_dir.resolve() != first
+        assert first.exists()
+
+    def test_dependency_order_shares_venv(self, tmp_path: Path, cache_root: Path):
+        """同一组依赖以不同顺序添加时复用同一个缓存 venv"""
+        managers = [EnvManager(tmp_path / f"config{i}") for i in range(2)]
+        with patch(self.INSTALL) as install:
+            managers[0].tools.add_dependencies("httpx", "pydantic")
+            managers[1].tools.add_dependencies("pydantic", "httpx")
+
+        venvs = [m.config.tools_venv_dir.resolve() for m in managers]
+        assert venvs[0] == venvs[1]
+        assert install.call_count == 1
+
+    def test_relative_cache_root(
+        self, manager: EnvManager, tmp_path: Path, monkeypatch
+    ):
+        """AEP_VENV_CACHE 为相对路径时按当前目录解析，链接不会失效"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("AEP_VENV_CACHE", ".venvs")
+        with patch(self.INSTALL):
+            manager.tools.add_dependencies("httpx")
+
+        venv_dir = manager.config.tools_venv_dir
+        assert venv_dir.is_symlink()
+        assert venv_dir.exists()
+        assert venv_dir.resolve().parent == (tmp_path / ".venvs").resolve()
+
+    def test_concurrent_builds_install_once(self, tmp_path: Path, cache_root: Path):
+        """多个配置目录同时需要同一依赖集合时只构建一次缓存 venv"""
+        managers = [EnvManager(tmp_path / f"config{i}") for i in range(4)]
+        for manager in managers:
+            manager.tools.save_requirements(
+                manager.config.tools_requirements, ["httpx"]
+            )
+
+        def slow_install(*args, **kwargs):
+            time.sleep(0.2)
+
+        with patch(self.INSTALL, side_effect=slow_install) as install:
+            with ThreadPoolExecutor(max_workers=len(managers)) as pool:
+                linked = list(
+                    pool.map(lambda m: m.tools._link_cached_venv(), managers)
+                )
+
+        assert all(linked)
+        assert install.call_count == 1
+        assert len({m.config.tools_venv_dir.resolve() for m in managers}) == 1
+
+    def test_disabled_without_env(self, manager: EnvManager, monkeypatch):
+        """未设置 AEP_VENV_CACHE 时使用普通 venv 目录"""
+        monkeypatch.delenv("AEP_VENV_CACHE", raising=False)
+        with patch.object(manager.tools, "install_dependencies"):
+            manager.tools.add_dependencies("httpx")
+
+        assert not manager.config.tools_venv_dir.is_symlink()
@@ -467,3 +467,65 @@ class TestToolsRunEdgeCases:
 
         assert result.return_code == 1
         assert "Usage" in result.stderr
+
+
+# ==================== Batch Exec Tests ====================
+
+
+class TestExecMany:
+    """测试 exec_many 批量执行"""
+
+    def test_results_in_order(self, simple_session: AEPSession):
+        """结果与命令一一对应"""
+        results = simple_session.exec_many(
+            [
+                'tools run "tools.calc.add(1, 2)"',
+                'tools run "tools.calc.mul(3, 4)"',
+                "echo hello",
+                'tools run "print(\'done\')"',
+            ]
+        )
+
+        assert len(results) == 4
+        assert all(r.return_code == 0 for r in results)
+        assert "3" in results[0].stdout
+        assert "12" in results[1].stdout
+        assert "hello" in results[2].stdout
+        assert "done" in results[3].stdout
+
+    def test_fresh_namespace_per_code(self, simple_session: AEPSession):
+        """每段代码使用独立的命名空间"""
+        results = simple_session.exec_many(
+            ['tools run "x = 1"', 'tools run "print(x)"']
+        )
+
+        assert results[0].return_code == 0
+        assert results[1].return_code == 1
+        assert "NameError" in results[1].stderr
+
+    def test_error_does_not_stop_batch(self, simple_session: AEPSession):
+        """单段代码出错不影响后续代码"""
+        results = simple_session.exec_many(
+            ['tools run "1/0"', 'tools run "tools.calc.add(2, 2)"']
+        )
+
+        assert results[0].return_code == 1
+        assert "ZeroDivision" in results[0].stderr
+        assert results[1].return_code == 0
+        assert "4" in results[1].stdout
+
+    def test_cd_applies_to_following_commands(
+        self, simple_session: AEPSession, tmp_path: Path
+    ):
+        """cd 对后续批次生效"""
+        (simple_session.workspace / "sub").mkdir()
+        results = simple_session.exec_many(
+            ['tools run "print(cwd)"', "cd sub", 'tools run "print(cwd)"']
+        )
+
+        assert results[0].stdout.strip().endswith("workspace")
+        assert results[2].stdout.strip().endswith("sub")
+
+    def test_empty_list(self, simple_session: AEPSession):
+        """空命令列表"""
+        assert simple_session.exec_many([]) == []
@@ -57,6 +57,25 @@ class TestAEPAttach:
         # 链接指向的目录应该包含工具文件
         assert (tools_link / "calc.py").exists()
 
+    def test_attach_replaces_dangling_symlink(
+        self, workspace: Path, config: EnvManager, tmp_path: Path
+    ):
+        """已有的悬空链接会被替换"""
+        agent_dir = workspace / ".agents"
+        agent_dir.mkdir()
+        (agent_dir / "tools").symlink_to(tmp_path / "gone", target_is_directory=True)
+
+        AEP.attach(workspace=workspace, config=config)
+
+        assert (agent_dir / "tools").resolve() == config.tools_dir.resolve()
+
+    def test_attach_refuses_real_directory(self, workspace: Path, config: EnvManager):
+        """同名真实目录不会被覆盖"""
+        (workspace / ".agents" / "tools").mkdir(parents=True)
+
+        with pytest.raises(RuntimeError, match="协议目录冲突"):
+            AEP.attach(workspace=workspace, config=config)
+
     def test_attach_with_path_string(self, workspace: Path, config: EnvManager):
         """支持字符串路径"""
         aep = AEP.attach(workspace=str(workspace), config=config)
@@ -109,6 +128,14 @@ class TestAEPCreateSession:
 
         assert session.config == aep.config
 
+    def test_session_uses_resolved_mounts(self, aep: AEP):
+        """session 复用 attach 时解析好的挂载目录"""
+        session = aep.create_session()
+
+        assert session.tools_dir == aep.config.tools_dir.resolve()
+        assert session.skills_dir == aep.config.skills_dir.resolve()
+        assert session.library_dir == aep.config.library_dir.resolve()
+
 
 class TestAEPDetach:
     """测试 detach 方法"""
@@ -177,6 +177,34 @@ class TestSessionToolsCommand:
         assert "Usage" in result.stderr
 
 
+class TestSessionNamespaces:
+    """测试 session.tools / session.skills 编程接口"""
+
+    def test_tools_list_matches_exec(self, session: AEPSession):
+        """session.tools.list() 与 exec("tools list") 一致"""
+        assert session.tools.list() == session.exec("tools list")
+
+    def test_tools_info(self, session: AEPSession):
+        """session.tools.info() 显示工具详情"""
+        assert "calc" in session.tools.info("calc").stdout.lower()
+        assert session.tools.info("nonexistent").return_code == 1
+
+    def test_tools_run_without_quoting(self, session: AEPSession):
+        """session.tools.run() 直接接收代码，无需引号包裹"""
+        result = session.tools.run("x = 'a\"b'\nprint(x, tools.calc.mul(6, 7))")
+
+        assert result.return_code == 0
+        assert 'a"b 42' in result.stdout
+
+    def test_skills_list_and_run(self, session: AEPSession):
+        """session.skills.list() / run()"""
+        assert "greeter" in session.skills.list().stdout
+
+        result = session.skills.run("greeter/main.py", ["AEP"])
+        assert result.return_code == 0
+        assert "Hello, AEP!" in result.stdout
+
+
 class TestSessionSkillsCommand:
     """测试 skills 命令"""
 